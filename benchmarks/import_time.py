@@ -0,0 +1,112 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Checks that the fast CLI paths (`version` and `--help`) start quickly.
+
+Each path is run a few times in a fresh interpreter with `-X importtime`. The best run is
+compared against a budget, and the script fails if it's over it or if a heavy module
+(the GUI, the HTTP stack, the launcher library...) got imported on the way.
+
+Usage: python benchmarks/import_time.py [--budget-ms 150] [--runs 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PATHS = {
+    "version": ["version"],
+    "--help": ["--help"],
+}
+# none of these are needed to print the version or the help
+HEAVY_MODULES = (
+    "PySide6",
+    "requests",
+    "tomlkit",
+    "minecraft_launcher_lib",
+    "darkdetect",
+)
+
+
+def measure(args: list, ignore: frozenset = frozenset()) -> tuple:
+    """
+    Runs Python once with -X importtime.
+
+    Args:
+        args (list): The arguments to pass to the interpreter, after -X importtime.
+        ignore (frozenset, optional): Top-level modules not to count, e.g. the ones imported on every startup. Defaults to frozenset().
+
+    Returns:
+        tuple: The total import time in milliseconds and the set of imported modules.
+    """
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    # run somewhere empty so we'd notice the logs folder or the config file being created
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        created = os.listdir(cwd)
+    if created:
+        raise RuntimeError(f"{' '.join(args)} created {', '.join(created)}")
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        # only count top-level imports, nested ones are part of their cumulative time
+        if not name[1:].startswith(" ") and name.strip() not in ignore:
+            total += int(cumulative)
+    return total / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=150,
+        help="The import time budget per path in milliseconds.",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="How often to run each path."
+    )
+    options = parser.parse_args()
+
+    # what the interpreter imports by itself (site, encodings...) isn't ours to optimise
+    _, startup = measure(["-c", "pass"])
+    startup = frozenset(startup)
+
+    failed = False
+    for name, args in PATHS.items():
+        timings = []
+        modules = set()
+        for _ in range(options.runs):
+            total, imported = measure(["-m", "vanilla_installer", *args], startup)
+            timings.append(total)
+            modules |= imported
+        best = min(timings)
+        heavy = sorted(module for module in modules if module in HEAVY_MODULES)
+        status = "ok"
+        if best > options.budget_ms:
+            status = f"OVER BUDGET ({options.budget_ms:.0f} ms)"
+            failed = True
+        if heavy:
+            status = f"imports {', '.join(heavy)}"
+            failed = True
+        median = sorted(timings)[len(timings) // 2]
+        print(f"{name:<10} best {best:7.1f} ms, median {median:7.1f} ms  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Measures how long installs take, against a local stand-in for the servers they download from.
+
+A local HTTP server impersonates raw.githubusercontent.com, meta.fabricmc.net, github.com and
+cdn.modrinth.com through the mirror support (see `network.mirrored`), with a generated pack
+of configurable size, and configurable latency and bandwidth. Each scenario runs in a fresh
+interpreter in an empty directory, so the download cache, the config and the peak memory
+start from scratch. The wall time per stage, the peak RSS and the bytes transferred are
+reported, and can be saved as a JSON baseline to compare later runs against.
+
+Usage: python benchmarks/install.py [--mods 40] [--mod-size-kib 256] [--latency-ms 20]
+       [--bandwidth-kib 0] [--runs 3] [--save-baseline FILE] [--baseline FILE [--tolerance 0.25]]
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Only the workers import the installer. Importing it sets up its logging, which would
+# copy this process's output into ./logs of wherever the benchmark was started from.
+
+MC_VERSION = "1.20.1"
+FABRIC_VERSION = "0.14.21"
+PACK_URL = f"https://raw.githubusercontent.com/Fabulously-Optimized/fabulously-optimized/main/Packwiz/{MC_VERSION}/pack.toml"
+MOD_URL = "https://cdn.modrinth.com/data/bench{0:04d}/versions/1.0.0/mod{0}.jar"
+STATS_PATH = "/_bench/bytes"  # not counted, the workers ask for the byte counter here
+CHUNK_SIZE = 16 * 1024
+SCENARIOS = ("run", "run_warm", "install_fabric", "download_pack", "create_profile")
+
+
+def _path(url: str) -> str:
+    # where the mirror looks for a URL, see network.mirrored
+    parts = urlsplit(url)
+    return f"/{parts.hostname}{parts.path}"
+
+
+def installer_urls() -> dict:
+    """
+    Looks up the URLs the installer downloads from, in a worker so this process doesn't import it.
+
+    Returns:
+        dict: The URLs, see `_urls`.
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, __file__, "--urls"],
+            cwd=cwd,
+            env=dict(os.environ, PYTHONPATH=str(ROOT)),
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"Couldn't import the installer:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _urls() -> dict:
+    """
+    The URLs the installer downloads from, besides the pack. Run in a worker, see `installer_urls`.
+
+    Returns:
+        dict: The URLs of the version list, the Fabric installer and the packwiz installer bootstrap.
+    """
+    from vanilla_installer import main, versions
+
+    return {
+        "versions": versions.VERSIONS_URL,
+        "fabric_meta": main.FABRIC_META_URL,
+        "bootstrap": main.BOOTSTRAP_URL,
+    }
+
+
+def build_site(mods: int, mod_size: int, bootstrap_size: int, urls: dict) -> dict:
+    """
+    Generates everything an install downloads.
+
+    Args:
+        mods (int): How many mods the pack has.
+        mod_size (int): The size of each mod, in bytes.
+        bootstrap_size (int): The size of the packwiz installer bootstrap, in bytes.
+        urls (dict): The URLs the installer downloads from, see `installer_urls`.
+
+    Returns:
+        dict: The files, mapped to by their path on the server.
+    """
+    site = {}
+    pack_dir = PACK_URL.rsplit("/", 1)[0]
+    index_entries = []
+    for i in range(mods):
+        data = os.urandom(mod_size)
+        site[_path(MOD_URL.format(i))] = data
+        metafile = (
+            f'name = "Mod {i}"\nfilename = "mod{i}.jar"\nside = "both"\n\n'
+            f'[download]\nurl = "{MOD_URL.format(i)}"\n'
+            f'hash-format = "sha512"\nhash = "{hashlib.sha512(data).hexdigest()}"\n'
+        ).encode()
+        site[_path(f"{pack_dir}/mods/mod{i}.pw.toml")] = metafile
+        index_entries.append((f"mods/mod{i}.pw.toml", metafile, True))
+    for name in ("options.txt", "config/sodium-options.json"):
+        data = os.urandom(2048)
+        site[_path(f"{pack_dir}/{name}")] = data
+        index_entries.append((name, data, False))
+
+    index = 'hash-format = "sha256"\n\n' + "".join(
+        f'[[files]]\nfile = "{name}"\nhash = "{hashlib.sha256(data).hexdigest()}"\n'
+        + ("metafile = true\n" if metafile else "")
+        + "\n"
+        for name, data, metafile in index_entries
+    )
+    site[_path(f"{pack_dir}/index.toml")] = index.encode()
+    site[_path(PACK_URL)] = (
+        f'name = "Benchmark"\nversion = "1.0.0"\npack-format = "packwiz:1.1.0"\n\n'
+        f'[index]\nfile = "index.toml"\nhash-format = "sha256"\n'
+        f'hash = "{hashlib.sha256(index.encode()).hexdigest()}"\n\n'
+        f'[versions]\nfabric = "{FABRIC_VERSION}"\nminecraft = "{MC_VERSION}"\n'
+    ).encode()
+    site[_path(urls["versions"])] = json.dumps({MC_VERSION: PACK_URL}).encode()
+
+    version_id = f"fabric-loader-{FABRIC_VERSION}-{MC_VERSION}"
+    fabric_zip = io.BytesIO()
+    with zipfile.ZipFile(fabric_zip, "w") as archive:
+        archive.writestr(
+            f"{version_id}/{version_id}.json",
+            json.dumps({"id": version_id, "inheritsFrom": MC_VERSION}),
+        )
+    site[
+        _path(urls["fabric_meta"].format(MC_VERSION, FABRIC_VERSION))
+    ] = fabric_zip.getvalue()
+    site[_path(urls["bootstrap"])] = os.urandom(bootstrap_size)
+    return site
+
+
+class Server(ThreadingHTTPServer):
+    """Serves a generated site like a CDN would: with ETags, ranges, latency and a bandwidth limit."""
+
+    daemon_threads = True
+
+    def __init__(self, site: dict, latency: float, bandwidth: int):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.site = site
+        self.etags = {
+            path: f'"{hashlib.sha1(data).hexdigest()}"' for path, data in site.items()
+        }
+        self.latency = latency  # seconds before each response
+        self.bandwidth = bandwidth  # bytes per second per connection, 0 for unlimited
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real servers
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        server = self.server
+        path = self.path.split("?", 1)[0]
+        if path == STATS_PATH:
+            body = str(server.bytes_sent).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        time.sleep(server.latency)
+        data = server.site.get(path)
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = server.etags[path]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        start, end = 0, len(data) - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", etag) == etag:
+            first, _, last = range_header[len("bytes=") :].partition("-")
+            start, end = int(first), int(last) if last else end
+            status = 206
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        for offset in range(start, end + 1, CHUNK_SIZE):
+            chunk = data[offset : min(offset + CHUNK_SIZE, end + 1)]
+            self.wfile.write(chunk)
+            with server.lock:
+                server.bytes_sent += len(chunk)
+            if server.bandwidth:
+                time.sleep(len(chunk) / server.bandwidth)
+
+
+def _peak_rss() -> int:
+    try:
+        import resource
+    except ImportError:
+        return 0  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def worker(scenario: str, server_url: str) -> dict:
+    """
+    Runs a scenario in this process. Meant to run in a fresh interpreter, see `run_scenario`.
+
+    Args:
+        scenario (str): One of SCENARIOS.
+        server_url (str): The URL of the server.
+
+    Returns:
+        dict: The wall time and stage times in seconds, the peak RSS and the bytes transferred.
+    """
+    from vanilla_installer import events, network
+    from vanilla_installer import main as vanilla_main
+
+    network.set_mirror(server_url)
+    mc_dir = str(Path.cwd() / ".minecraft")
+    version_id = f"fabric-loader-{FABRIC_VERSION}-{MC_VERSION}"
+    stages = {}
+
+    def record(event) -> None:
+        if isinstance(event, events.StageFinished):
+            stages[event.stage] = event.duration
+
+    def sent() -> int:
+        with urlopen(server_url + STATS_PATH) as response:
+            return int(response.read())
+
+    def install() -> None:
+        bus = events.Bus()
+        bus.subscribe(record)
+        vanilla_main.run(
+            mc_dir,
+            MC_VERSION,
+            17.3,
+            "CLI",
+            save_dir=False,
+            launcher_dir=mc_dir,
+            bus=bus,
+        )
+
+    if scenario == "run_warm":
+        # the second install of the same pack: everything is cached and installed already
+        install()
+    elif scenario != "run":
+        start = time.perf_counter()
+        vanilla_main.get_pack_mc_versions()
+        stages["versions"] = time.perf_counter() - start
+
+    before = sent()
+    start = time.perf_counter()
+    if scenario in ("run", "run_warm"):
+        install()
+    elif scenario == "install_fabric":
+        vanilla_main.install_fabric(MC_VERSION, mc_dir)
+    elif scenario == "download_pack":
+        vanilla_main.download_pack(None, "CLI", mc_dir)
+    elif scenario == "create_profile":
+        vanilla_main.create_profile(mc_dir, version_id, launcher_dir=mc_dir)
+    wall = time.perf_counter() - start
+    if scenario not in ("run", "run_warm"):
+        stages[scenario] = wall
+    return {
+        "wall": wall,
+        "stages": stages,
+        "peak_rss": _peak_rss(),
+        "bytes": sent() - before,
+    }
+
+
+def run_scenario(scenario: str, server_url: str) -> dict:
+    """
+    Runs a scenario in a fresh interpreter, in an empty directory that's also its home.
+
+    Args:
+        scenario (str): One of SCENARIOS.
+        server_url (str): The URL of the server.
+
+    Returns:
+        dict: The result of `worker`.
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        # the launcher directory is found through the home directory
+        env = dict(os.environ, PYTHONPATH=str(ROOT), HOME=cwd, APPDATA=cwd)
+        result = subprocess.run(
+            [sys.executable, __file__, "--worker", scenario, "--server", server_url],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"{scenario} failed:\n{result.stderr}")
+    # the last line, anything the installer printed comes before it
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def summarize(results: list) -> dict:
+    """
+    Combines the runs of a scenario into medians.
+
+    Args:
+        results (list): The results of `worker`.
+
+    Returns:
+        dict: The median wall time, stage times, peak RSS and bytes.
+    """
+    stage_names = dict.fromkeys(name for result in results for name in result["stages"])
+    return {
+        "wall": statistics.median(result["wall"] for result in results),
+        "stages": {
+            name: statistics.median(
+                result["stages"][name] for result in results if name in result["stages"]
+            )
+            for name in stage_names
+        },
+        "peak_rss": statistics.median(result["peak_rss"] for result in results),
+        "bytes": statistics.median(result["bytes"] for result in results),
+    }
+
+
+def compare(summaries: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Prints how the wall times compare to a baseline.
+
+    Args:
+        summaries (dict): The summary of each scenario.
+        baseline (dict): A baseline saved with --save-baseline.
+        tolerance (float): How much slower than the baseline is still fine, e.g. 0.25 for 25%.
+
+    Returns:
+        bool: Whether every scenario is within the tolerance.
+    """
+    ok = True
+    for scenario, summary in summaries.items():
+        before = baseline["scenarios"].get(scenario)
+        if before is None:
+            print(f"{scenario:<15} not in the baseline")
+            continue
+        change = summary["wall"] / before["wall"] - 1
+        status = "ok"
+        if change > tolerance:
+            status = f"REGRESSED (more than {tolerance:.0%})"
+            ok = False
+        print(
+            f"{scenario:<15} {before['wall'] * 1000:9.1f} ms -> {summary['wall'] * 1000:9.1f} ms ({change:+.0%})  {status}"
+        )
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mods", type=int, default=40, help="Mods in the pack.")
+    parser.add_argument(
+        "--mod-size-kib", type=int, default=256, help="The size of each mod in KiB."
+    )
+    parser.add_argument(
+        "--bootstrap-size-kib",
+        type=int,
+        default=64,
+        help="The size of the packwiz installer bootstrap in KiB.",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=20, help="Latency of each request."
+    )
+    parser.add_argument(
+        "--bandwidth-kib",
+        type=int,
+        default=0,
+        help="Bandwidth per connection in KiB/s, 0 for unlimited.",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Runs per scenario.")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="A scenario to run, can be given several times. Defaults to all of them.",
+    )
+    parser.add_argument("--save-baseline", metavar="FILE", help="Save the results.")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="Compare against saved results."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="How much slower than the baseline is still fine. Defaults to 0.25 (25%%).",
+    )
+    parser.add_argument("--worker", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    parser.add_argument("--urls", action="store_true", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.urls:
+        print(json.dumps(_urls()))
+        return 0
+    if options.worker:
+        print(json.dumps(worker(options.worker, options.server)))
+        return 0
+
+    settings = {
+        "mods": options.mods,
+        "mod_size_kib": options.mod_size_kib,
+        "bootstrap_size_kib": options.bootstrap_size_kib,
+        "latency_ms": options.latency_ms,
+        "bandwidth_kib": options.bandwidth_kib,
+    }
+    baseline = None
+    if options.baseline:
+        baseline = json.loads(Path(options.baseline).read_text(encoding="utf-8"))
+        if baseline["settings"] != settings:
+            print(
+                f"The baseline was measured with {baseline['settings']}, not {settings}.",
+                file=sys.stderr,
+            )
+            return 2
+
+    site = build_site(
+        options.mods,
+        options.mod_size_kib * 1024,
+        options.bootstrap_size_kib * 1024,
+        installer_urls(),
+    )
+    server = Server(site, options.latency_ms / 1000, options.bandwidth_kib * 1024)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    summaries = {}
+    try:
+        for scenario in options.scenario or SCENARIOS:
+            results = [run_scenario(scenario, server.url) for _ in range(options.runs)]
+            summary = summaries[scenario] = summarize(results)
+            stages = ", ".join(
+                f"{name} {duration * 1000:.0f} ms"
+                for name, duration in summary["stages"].items()
+            )
+            print(
+                f"{scenario:<15} {summary['wall'] * 1000:9.1f} ms  "
+                f"peak RSS {summary['peak_rss'] / 2**20:7.1f} MiB  "
+                f"{summary['bytes'] / 2**20:8.1f} MiB transferred  ({stages})"
+            )
+    finally:
+        server.shutdown()
+
+    if options.save_baseline:
+        Path(options.save_baseline).write_text(
+            json.dumps({"settings": settings, "scenarios": summaries}, indent=2),
+            encoding="utf-8",
+        )
+        print(f"Saved the results to {options.save_baseline}.")
+    if baseline is not None and not compare(summaries, baseline, options.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
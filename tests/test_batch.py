@@ -0,0 +1,71 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Checks how batch manifests are read.
+Run with `python -m unittest discover tests`.
+"""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from vanilla_installer import batch
+
+
+class LoadManifestTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def write(self, name: str, content: str) -> str:
+        path = self.root / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def test_toml(self):
+        manifest = self.write(
+            "batch.toml",
+            # literal strings, Windows paths have backslashes
+            f"[[instance]]\nminecraft_dir = '{self.root / 'a'}'\nversion = \"1.20.1\"\n\n"
+            f"[[instance]]\nminecraft_dir = '{self.root / 'b'}'\n",
+        )
+        instances = batch.load_manifest(manifest)
+        self.assertEqual(
+            [(i.minecraft_dir, i.version) for i in instances],
+            [(str(self.root / "a"), "1.20.1"), (str(self.root / "b"), None)],
+        )
+
+    def test_missing_minecraft_dir(self):
+        manifest = self.write("batch.json", json.dumps([{"version": "1.20.1"}]))
+        with self.assertRaisesRegex(ValueError, "Instance 1 has no minecraft_dir"):
+            batch.load_manifest(manifest)
+
+    def test_duplicate_minecraft_dir(self):
+        manifest = self.write(
+            "batch.json",
+            json.dumps(
+                {
+                    "instance": [
+                        {"minecraft_dir": str(self.root / "a")},
+                        {"minecraft_dir": str(self.root / "b")},
+                        # the same directory, written differently
+                        {"minecraft_dir": str(self.root / "b" / ".." / "a")},
+                    ]
+                }
+            ),
+        )
+        with self.assertRaisesRegex(ValueError, "Instances 1 and 3"):
+            batch.load_manifest(manifest)
+
+    def test_run_rejects_duplicates(self):
+        instances = [
+            batch.Instance(str(self.root / "a")),
+            batch.Instance(f"{self.root}/./a"),
+        ]
+        with self.assertRaises(ValueError):
+            batch.run(instances)
+
+
+if __name__ == "__main__":
+    unittest.main()
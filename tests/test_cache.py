@@ -0,0 +1,123 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Checks the download cache against a local HTTP server.
+Run with `python -m unittest discover tests`.
+"""
+import hashlib
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from vanilla_installer import cache
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = self.server.files[self.path]
+        if self.path in self.server.short:
+            # claim the full length, then hang up halfway
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = cache.DownloadCache(tmp.name)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.files = {}
+        self.server.short = set()
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def test_etag_revalidation(self):
+        url = self.url("/index.toml")
+        self.server.files["/index.toml"] = b"v1"
+        self.assertEqual(self.cache.fetch(url), b"v1")
+        # within FRESH_FOR, the cached copy is trusted without asking
+        self.assertEqual(self.cache.fetch(url), b"v1")
+        self.assertEqual(len(self.server.requests), 1)
+
+        self.cache._validated.clear()
+        self.assertEqual(self.cache.fetch(url), b"v1")
+        self.assertEqual(len(self.server.requests), 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["revalidated"]), (2, 1))
+
+        self.server.files["/index.toml"] = b"v2"
+        self.cache._validated.clear()
+        self.assertEqual(self.cache.fetch(url), b"v2")
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_eviction_keeps_shared_blobs(self):
+        shared, other = b"s" * 100, b"o" * 100
+        self.server.files.update({"/a.jar": shared, "/b.jar": shared, "/c.jar": other})
+        for i, path in enumerate(("/a.jar", "/c.jar", "/b.jar")):
+            self.cache.fetch(self.url(path))
+            # the order they were used in, without relying on the clock's resolution
+            self.cache.index["entries"][self.url(path)]["last_access"] = i
+        self.assertEqual(self.cache.stats()["size"], 200)
+
+        # a.jar goes first, but b.jar still uses its blob, so c.jar has to go too
+        self.assertEqual(self.cache.evict(150), 100)
+        self.assertEqual(list(self.cache.index["entries"]), [self.url("/b.jar")])
+        digest = hashlib.sha256(shared).hexdigest()
+        self.assertTrue(self.cache._blob(digest).exists())
+        self.assertFalse(self.cache._blob(hashlib.sha256(other).hexdigest()).exists())
+        requests_before = len(self.server.requests)
+        self.assertEqual(self.cache.fetch(self.url("/b.jar"), revalidate=False), shared)
+        self.assertEqual(len(self.server.requests), requests_before)
+
+    def test_hits_are_written_behind(self):
+        url = self.url("/mod.jar")
+        self.server.files["/mod.jar"] = b"jar"
+        self.cache.fetch(url)
+        self.cache.fetch(url, revalidate=False)
+        on_disk = json.loads(self.cache.index_path.read_bytes())
+        self.assertEqual(on_disk["stats"]["hits"], 0)
+        self.cache.flush()
+        on_disk = json.loads(self.cache.index_path.read_bytes())
+        self.assertEqual(on_disk["stats"]["hits"], 1)
+
+    def test_short_body_is_not_cached(self):
+        self.server.files["/mod.jar"] = b"jar" * 1000
+        self.server.short.add("/mod.jar")
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.cache.fetch(self.url("/mod.jar"))
+        self.assertEqual(self.cache.index["entries"], {})
+        partial = self.cache.path / "partial"
+        self.assertEqual(list(partial.iterdir()) if partial.exists() else [], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Checks the hashes packs pin their files with, murmur2 in particular.
+Run with `python -m unittest discover tests`.
+"""
+import hashlib
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from vanilla_installer import hashing, network
+
+# from the reference C implementation of MurmurHash2, with seed 1
+MURMUR2_VECTORS = {
+    b"": 1540447798,
+    b"a": 626045324,
+    b"ab": 1692487918,
+    b"abc": 1621425345,
+    b"abcd": 3376380438,
+    b"helloworld": 2824650221,
+    b"Thequickbrownfoxjumpsoverthelazydog": 3751777527,
+}
+
+
+class HashingTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "file"
+
+    def test_murmur2_vectors(self):
+        for data, expected in MURMUR2_VECTORS.items():
+            with self.subTest(data=data):
+                self.assertEqual(hashing.murmur2(data), expected)
+
+    def test_murmur2_ignores_whitespace(self):
+        self.assertEqual(
+            hashing.murmur2(b"The quick brown fox\tjumps over\r\nthe lazy dog\n"),
+            MURMUR2_VECTORS[b"Thequickbrownfoxjumpsoverthelazydog"],
+        )
+
+    def test_murmur2_file_across_chunks(self):
+        rng = random.Random(0)
+        for size in (
+            0,
+            3,
+            network.CHUNK_SIZE - 1,
+            network.CHUNK_SIZE,
+            network.CHUNK_SIZE + 1,
+            3 * network.CHUNK_SIZE + 2,
+        ):
+            # plenty of whitespace, so words straddle the chunks at every offset
+            data = bytes(rng.choice(b"ab \n\t\rxyz") for _ in range(size))
+            self.path.write_bytes(data)
+            with self.subTest(size=size):
+                self.assertEqual(hashing.murmur2_file(self.path), hashing.murmur2(data))
+
+    def test_hash_file(self):
+        data = b"sodium-fabric-mc0.4.10+1.19.4.jar\n" * 5000
+        self.path.write_bytes(data)
+        self.assertEqual(
+            hashing.hash_file(self.path, ("SHA1", "sha512", "murmur2")),
+            {
+                "sha1": hashlib.sha1(data).hexdigest(),
+                "sha512": hashlib.sha512(data).hexdigest(),
+                "murmur2": str(hashing.murmur2(data)),
+            },
+        )
+
+    def test_hash_bytes_notation(self):
+        self.assertEqual(hashing.hash_bytes(b"", "murmur2"), "1540447798")
+        self.assertEqual(
+            hashing.hash_bytes(b"", "md5"), "d41d8cd98f00b204e9800998ecf8427e"
+        )
+        self.assertTrue(
+            hashing.matches(
+                "D41D8CD98F00B204E9800998ECF8427E", "d41d8cd98f00b204e9800998ecf8427e"
+            )
+        )
+
+    def test_murmur2_cannot_stream(self):
+        with self.assertRaises(ValueError):
+            hashing.new("murmur2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Checks that files stored in a mirror folder are found again through `network.mirrored`.
+Run with `python -m unittest discover tests`.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+import requests
+
+from vanilla_installer import mirror, network
+
+ENCODED_URL = "https://cdn.modrinth.com/data/AANobbMI/versions/OihdIimA/sodium-fabric-mc0.4.10%2B1.19.4.jar"
+
+
+class MirrorPathTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.mirror_dir = tmp.name
+
+    def test_encoded_path_is_stored_decoded(self):
+        path = mirror.path_for(ENCODED_URL, self.mirror_dir)
+        self.assertEqual(path.name, "sodium-fabric-mc0.4.10+1.19.4.jar")
+
+    def test_encoded_path_is_served_from_folder(self):
+        path = mirror.path_for(ENCODED_URL, self.mirror_dir)
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"jar")
+        url = network.mirrored(ENCODED_URL, self.mirror_dir)
+        with network.get_session().get(url) as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"jar")
+
+    def test_quoting_does_not_matter(self):
+        unquoted = ENCODED_URL.replace("%2B", "+")
+        self.assertEqual(
+            network.mirrored(ENCODED_URL, self.mirror_dir),
+            network.mirrored(unquoted, self.mirror_dir),
+        )
+        self.assertEqual(
+            mirror.path_for(ENCODED_URL, self.mirror_dir),
+            mirror.path_for(unquoted, self.mirror_dir),
+        )
+
+    def test_encoded_traversal_is_rejected(self):
+        with self.assertRaises(ValueError):
+            mirror.path_for("https://example.com/%2e%2e/%2e%2e/evil", self.mirror_dir)
+
+    def test_query_string_is_rejected(self):
+        url = "https://example.com/download?file=mod.jar"
+        with self.assertRaises(requests.exceptions.InvalidURL):
+            network.mirrored(url, self.mirror_dir)
+        with self.assertRaises(ValueError):
+            mirror.path_for(url, self.mirror_dir)
+        # without a mirror, the URL is fetched as is
+        self.assertEqual(network.mirrored(url, ""), url)
+
+    def test_folder_path(self):
+        self.assertTrue(
+            Path(mirror.path_for(ENCODED_URL, self.mirror_dir)).is_relative_to(
+                Path(self.mirror_dir).resolve()
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
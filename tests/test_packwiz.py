@@ -0,0 +1,144 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Checks that the native packwiz installer only touches what changed between installs.
+The pack is served from a folder through file:// URLs.
+Run with `python -m unittest discover tests`.
+"""
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import Optional
+from unittest import mock
+
+from vanilla_installer import cache, packwiz
+
+
+class PackwizInstallTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.pack_dir = self.root / "pack"
+        self.mc_dir = self.root / ".minecraft"
+        (self.pack_dir / "mods").mkdir(parents=True)
+        self.mc_dir.mkdir()
+        self.downloads = []
+        self.published = 0
+
+    def publish(self, mods: dict, sides: Optional[dict] = None) -> None:
+        # writes a pack with a mod for every name -> content in `mods`, for both sides unless
+        # `sides` says otherwise
+        sides = sides or {}
+        index = 'hash-format = "sha256"\n\n'
+        for name, data in mods.items():
+            jar = self.pack_dir / "jars" / f"{name}.jar"
+            jar.parent.mkdir(exist_ok=True)
+            jar.write_bytes(data)
+            metafile = (
+                f'name = "{name}"\nfilename = "{name}.jar"\nside = "{sides.get(name, "both")}"\n\n'
+                f'[download]\nurl = "{jar.as_uri()}"\n'
+                f'hash-format = "sha1"\nhash = "{hashlib.sha1(data).hexdigest()}"\n'
+            ).encode()
+            (self.pack_dir / "mods" / f"{name}.pw.toml").write_bytes(metafile)
+            index += (
+                f'[[files]]\nfile = "mods/{name}.pw.toml"\n'
+                f'hash = "{hashlib.sha256(metafile).hexdigest()}"\nmetafile = true\n\n'
+            )
+        (self.pack_dir / "index.toml").write_text(index, encoding="utf-8")
+        pack = self.pack_dir / "pack.toml"
+        pack.write_text(
+            'name = "Test"\npack-format = "packwiz:1.1.0"\n\n'
+            f'[index]\nfile = "index.toml"\nhash-format = "sha256"\n'
+            f'hash = "{hashlib.sha256(index.encode()).hexdigest()}"\n',
+            encoding="utf-8",
+        )
+        # a second publish within the same second must not look unmodified
+        self.published += 1
+        later = time.time() + 10 * self.published
+        os.utime(pack, (later, later))
+
+    def install(self) -> None:
+        # a fresh cache object forgets which URLs it revalidated, but keeps the files
+        download_cache = cache.DownloadCache(self.root / "cache")
+        fetch_path = download_cache.fetch_path
+
+        def record(url, *args, **kwargs):
+            if url.endswith(".jar"):
+                self.downloads.append(url.rsplit("/", 1)[1])
+            return fetch_path(url, *args, **kwargs)
+
+        with mock.patch.object(
+            cache, "_default_cache", download_cache
+        ), mock.patch.object(download_cache, "fetch_path", record):
+            packwiz.install(
+                self.pack_dir.joinpath("pack.toml").as_uri(), str(self.mc_dir)
+            )
+
+    def test_update_only_downloads_what_changed(self):
+        self.publish({"sodium": b"sodium 1", "lithium": b"lithium 1"})
+        self.install()
+        self.assertEqual(sorted(self.downloads), ["lithium.jar", "sodium.jar"])
+
+        self.downloads.clear()
+        self.publish({"sodium": b"sodium 2", "iris": b"iris 1"})
+        (self.pack_dir / "mods" / "lithium.pw.toml").unlink()
+        self.install()
+        self.assertEqual(sorted(self.downloads), ["iris.jar", "sodium.jar"])
+        mods = self.mc_dir / "mods"
+        self.assertEqual(
+            sorted(path.name for path in mods.iterdir()), ["iris.jar", "sodium.jar"]
+        )
+        self.assertEqual((mods / "sodium.jar").read_bytes(), b"sodium 2")
+
+    def test_server_only_mod_is_skipped(self):
+        self.publish(
+            {"sodium": b"sodium 1", "lithium": b"lithium 1"}, {"lithium": "server"}
+        )
+        self.install()
+        self.assertEqual(self.downloads, ["sodium.jar"])
+        files = packwiz.read_manifest(self.mc_dir)["files"]
+        self.assertIsNone(files["mods/lithium.pw.toml"]["path"])
+
+    def test_corrupt_download_fails(self):
+        self.publish({"sodium": b"sodium 1"})
+        (self.pack_dir / "jars" / "sodium.jar").write_bytes(b"corrupt")
+        with self.assertRaises(packwiz.HashMismatchError):
+            self.install()
+        self.assertFalse((self.mc_dir / "mods" / "sodium.jar").exists())
+        self.assertFalse((self.mc_dir / packwiz.MANIFEST_NAME).exists())
+
+    def test_unchanged_pack_downloads_nothing(self):
+        self.publish({"sodium": b"sodium 1"})
+        self.install()
+        self.downloads.clear()
+        self.install()
+        self.assertEqual(self.downloads, [])
+
+    def test_modified_file_is_installed_again(self):
+        self.publish({"sodium": b"sodium 1"})
+        self.install()
+        jar = self.mc_dir / "mods" / "sodium.jar"
+        jar.write_bytes(b"tampered")
+        self.downloads.clear()
+        self.install()
+        self.assertEqual(self.downloads, ["sodium.jar"])
+        self.assertEqual(jar.read_bytes(), b"sodium 1")
+
+    def test_touched_but_unchanged_file_is_kept(self):
+        self.publish({"sodium": b"sodium 1"})
+        self.install()
+        jar = self.mc_dir / "mods" / "sodium.jar"
+        os.utime(jar, (time.time() + 60, time.time() + 60))
+        self.downloads.clear()
+        self.install()
+        self.assertEqual(self.downloads, [])
+        manifest = packwiz.read_manifest(self.mc_dir)["files"]["mods/sodium.pw.toml"]
+        self.assertEqual(manifest["mtime_ns"], jar.stat().st_mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,17 @@
+"""
+The language files in assets/lang, compiled into Python so they don't need to be parsed.
+Generated by `python -m vanilla_installer.i18n`, don't edit it by hand.
+"""
+
+CATALOGS = {
+    "en_us": {
+        "vanilla_installer.gui.subtitle": "Vanilla Installer",
+        "vanilla_installer.gui.install_button": "Install",
+        "vanilla_installer.gui.cancel_button": "Cancel",
+        "vanilla_installer.gui.mc_version": "Minecraft version:",
+        "vanilla_installer.gui.location": "Location:",
+        "vanilla_installer.gui.issues_button": "Report bugs",
+        "vanilla_installer.gui.theme_toggle": "Toggle theme",
+        "vanilla_installer.gui.settings": "Settings",
+    }
+}
@@ -0,0 +1,192 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Installs Fabulously Optimized to many game directories in one process.
+
+A batch manifest is a TOML or JSON file with a list of instances:
+
+```toml
+[[instance]]
+minecraft_dir = "/srv/minecraft/seat-01"
+version = "1.19.4"  # optional, defaults to the newest version
+java_ver = 17.3  # optional, defaults to the right one for the version
+icon = "seat-01.png"  # optional, a custom profile icon
+```
+
+In JSON, use `{"instance": [...]}` or just the list.
+All instances get a profile in the same launcher, which is written once at the end.
+Artifacts shared between instances (the version list, pack.toml, the Fabric profile zip, mods)
+are only downloaded once, see `cache.FRESH_FOR`.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import tomlkit as toml
+
+from vanilla_installer import events, log, main, profiles
+
+logger = log.setup_logging()
+
+WORKERS = 4  # mentioned in the help of the install-batch command
+
+
+@dataclass
+class Instance:
+    """An entry of a batch manifest."""
+
+    minecraft_dir: str
+    version: Optional[str] = None
+    java_ver: Optional[float] = None
+    icon: Optional[str] = None
+
+
+@dataclass
+class Result:
+    """The outcome of installing one instance."""
+
+    instance: Instance
+    success: bool
+    duration: float  # seconds
+    error: Optional[str] = None
+
+
+def check_duplicates(instances: list) -> None:
+    """
+    Checks that no two instances install to the same directory. They'd overwrite each other's
+    files while installing at the same time.
+
+    Args:
+        instances (list): A list of Instance.
+
+    Raises:
+        ValueError: If two instances have the same minecraft_dir, after resolving it.
+    """
+    seen = {}
+    for number, instance in enumerate(instances, 1):
+        # relative directories are relative to the working directory, like for `main.run`
+        key = os.path.normcase(Path(instance.minecraft_dir).resolve())
+        if key in seen:
+            raise ValueError(
+                f"Instances {seen[key]} and {number} both install to {key}."
+            )
+        seen[key] = number
+
+
+def load_manifest(path: str) -> list:
+    """
+    Reads a batch manifest.
+
+    Args:
+        path (str): The path to the TOML or JSON manifest.
+
+    Raises:
+        ValueError: If the manifest is malformed, or lists a directory twice.
+
+    Returns:
+        list: A list of Instance.
+    """
+    content = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix.lower() == ".json":
+        data = json.loads(content)
+    else:
+        data = toml.parse(content).unwrap()
+    entries = data.get("instance", []) if isinstance(data, dict) else data
+    instances = []
+    for number, entry in enumerate(entries, 1):
+        if "minecraft_dir" not in entry:
+            raise ValueError(f"Instance {number} has no minecraft_dir.")
+        instances.append(
+            Instance(
+                str(entry["minecraft_dir"]),
+                entry.get("version"),
+                entry.get("java_ver"),
+                entry.get("icon"),
+            )
+        )
+    check_duplicates(instances)
+    return instances
+
+
+def install_instance(
+    instance: Instance,
+    engine: str = "native",
+    launcher_dir: Optional[str] = None,
+    profile_batch: Optional[profiles.Batch] = None,
+) -> Result:
+    """
+    Installs a single instance, catching any error so the rest of the batch can continue.
+
+    Args:
+        instance (Instance): The instance to install.
+        engine (str, optional): The packwiz engine to use. Defaults to "native".
+        launcher_dir (str, optional): The directory of the launcher. Defaults to the default directory based on your OS.
+        profile_batch (profiles.Batch, optional): The batch to add the profile to. Defaults to writing it right away.
+
+    Returns:
+        Result: The outcome.
+    """
+    start = time.perf_counter()
+    try:
+        version = instance.version or main.newest_version()
+        java_ver = instance.java_ver or main.java_for_version(version)
+        # only log, progress bars of instances installing at the same time would overwrite each other
+        bus = events.Bus()
+        events.log_sink(bus)
+        success = main.run(
+            instance.minecraft_dir,
+            version,
+            java_ver,
+            "CLI",
+            engine=engine,
+            save_dir=False,
+            icon=instance.icon,
+            launcher_dir=launcher_dir,
+            profile_batch=profile_batch,
+            bus=bus,
+        )
+        error = None if success else "The pack could not be installed."
+    except Exception as e:
+        logger.exception(f"Could not install to {instance.minecraft_dir}: {e}")
+        success, error = False, str(e)
+    return Result(instance, success, time.perf_counter() - start, error)
+
+
+def run(
+    instances: list,
+    workers: int = WORKERS,
+    engine: str = "native",
+    launcher_dir: Optional[str] = None,
+) -> list:
+    """
+    Installs every instance on a pool of `workers` threads.
+
+    Args:
+        instances (list): A list of Instance.
+        workers (int, optional): How many instances to install at once. Defaults to WORKERS.
+        engine (str, optional): The packwiz engine to use. Defaults to "native".
+        launcher_dir (str, optional): The directory of the launcher. Defaults to the default directory based on your OS.
+
+    Raises:
+        ValueError: If two instances install to the same directory, see `check_duplicates`.
+
+    Returns:
+        list: A Result per instance, in the same order.
+    """
+    check_duplicates(instances)
+    # resolve the version list once up front instead of racing for it in every worker
+    main.get_pack_mc_versions()
+    with profiles.Batch(launcher_dir) as profile_batch:
+        with ThreadPoolExecutor(workers, "install-batch") as executor:
+            return list(
+                executor.map(
+                    lambda instance: install_instance(
+                        instance, engine, launcher_dir, profile_batch
+                    ),
+                    instances,
+                )
+            )
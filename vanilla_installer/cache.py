@@ -0,0 +1,548 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+The on-disk download cache for Vanilla Installer.
+
+Every file is stored once under its SHA-256 (content-addressed), and an index maps
+each URL to the blob it last resolved to along with the validators (ETag/Last-Modified)
+needed to revalidate it.
+
+Files can be fetched with the hash they're expected to have. It's computed while the file
+downloads, and a download that doesn't match is thrown away and tried again, so a corrupted
+file never makes it into the cache or fails more than its own download.
+"""
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import requests
+
+from vanilla_installer import hashing, log, network, trace
+
+logger = log.setup_logging()
+
+CACHE_DIR = Path("cache").resolve()
+MAX_SIZE = 512 * 1024 * 1024  # 512 MiB
+# seconds a revalidated entry is trusted without asking the server again
+FRESH_FOR = 5 * 60
+# how many more times a download that doesn't match its expected hash is tried
+RETRIES = 2
+# seconds until changes from cache hits are written to the index, see DownloadCache.flush
+FLUSH_DELAY = 0.5
+
+_lock = threading.RLock()
+_url_locks = {}
+
+
+def _url_lock(url: str) -> threading.Lock:
+    # only one thread at a time may download a given URL, they'd share the .part file
+    with _lock:
+        return _url_locks.setdefault(url, threading.Lock())
+
+
+class DownloadCache:
+    """
+    A content-addressed download cache with HTTP revalidation and LRU eviction.
+
+    Args:
+        path (Path, optional): The directory to keep the cache in. Defaults to CACHE_DIR.
+        max_size (int, optional): The size cap in bytes. Defaults to MAX_SIZE.
+    """
+
+    def __init__(self, path: Path = CACHE_DIR, max_size: int = MAX_SIZE) -> None:
+        self.path = Path(path)
+        self.max_size = max_size
+        self.objects = self.path / "objects"
+        self.index_path = self.path / "index.json"
+        self._index = None
+        self._dirty = False  # whether the index has changes that aren't on disk yet
+        self._flush_timer = None
+        # url -> time.monotonic() of the last revalidation in this process
+        self._validated = {}
+        atexit.register(self.flush)
+
+    # INDEX
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_path.read_bytes())
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+            self._index.setdefault("entries", {})
+            self._index.setdefault(
+                "stats", {"hits": 0, "misses": 0, "revalidated": 0, "bytes_saved": 0}
+            )
+        return self._index
+
+    def _save_index(self) -> None:
+        self._dirty = False
+        self.path.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(self.index, indent=2), encoding="utf-8")
+        os.replace(temp_path, self.index_path)
+
+    def _save_index_later(self) -> None:
+        # Hits only change the statistics and access times. Like config.write, the index is
+        # written once FLUSH_DELAY after the first of them, so a batch of hits costs one write.
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(FLUSH_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """
+        Writes pending changes to the index.
+        This runs automatically shortly after a cache hit and when the program exits.
+        """
+        with _lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self._save_index()
+
+    def _blob(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def _lookup(self, url: str) -> Optional[dict]:
+        entry = self.index["entries"].get(url)
+        if entry is None:
+            return None
+        if not self._blob(entry["sha256"]).exists():
+            # the blob was removed behind our back, forget about it
+            del self.index["entries"][url]
+            return None
+        return entry
+
+    def _partial(self, url: str) -> Path:
+        return self.path / "partial" / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _read_state(self, part: Path) -> dict:
+        try:
+            return json.loads(part.with_suffix(".json").read_bytes())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_state(self, part: Path, state: dict) -> None:
+        part.parent.mkdir(parents=True, exist_ok=True)
+        part.with_suffix(".json").write_text(json.dumps(state), encoding="utf-8")
+
+    def _discard(self, part: Path) -> None:
+        part.unlink(missing_ok=True)
+        part.with_suffix(".json").unlink(missing_ok=True)
+
+    def _download(
+        self,
+        url: str,
+        headers: dict,
+        progress: Optional[Callable] = None,
+        formats: tuple = (),
+    ) -> Optional[tuple]:
+        # Downloads to a .part file that is kept when the download fails, as long as the server
+        # supports ranges. The next attempt then continues where this one stopped.
+        # The file is hashed with SHA-256 and `formats` on the way, murmur2 once it's complete.
+        # Returns None if the server answered 304 Not Modified.
+        formats = tuple(dict.fromkeys(("sha256", *formats)))
+        part = self._partial(url)
+        state = self._read_state(part) if part.exists() else {}
+        if state.get("segments"):
+            try:
+                return self._download_segments(url, part, state, progress, formats)
+            except network.RangeError:
+                logger.info(f"{url} changed on the server, restarting the download.")
+                self._discard(part)
+                state = {}
+
+        headers = dict(headers)
+        offset = part.stat().st_size if state.get("validator") else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = state["validator"]
+            headers["Accept-Encoding"] = "identity"
+        hashers = {
+            hash_format: hashing.new(hash_format)
+            for hash_format in formats
+            if hash_format in hashing.STREAMING_FORMATS
+        }
+        with network.get(url, headers=headers, stream=True) as response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            if response.status_code == 206:
+                logger.info(f"Resuming the download of {url} at byte {offset}.")
+                with open(part, "rb") as file:
+                    while chunk := file.read(network.CHUNK_SIZE):
+                        for hasher in hashers.values():
+                            hasher.update(chunk)
+                mode = "ab"
+            else:
+                mode = "wb"
+                state = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                if network.is_resumable(response):
+                    state["validator"] = network.validator(response)
+                    length = int(response.headers.get("Content-Length", 0))
+                    if length >= network.SEGMENT_THRESHOLD:
+                        response.close()
+                        state.update(size=length, segments=network.SEGMENTS, done=[])
+                        return self._download_segments(
+                            url, part, state, progress, formats
+                        )
+            self._write_state(part, state)
+            if progress is not None and "Content-Length" in response.headers:
+                # for a 206, that's just the rest of the file
+                progress(0, int(response.headers["Content-Length"]))
+            try:
+                with open(part, mode) as file:
+                    written = network.stream_to(
+                        response, file, tuple(hashers.values()), progress=progress
+                    )
+            except BaseException:
+                if not state.get("validator"):
+                    self._discard(part)
+                raise
+            # urllib3 1.x doesn't notice a connection that closes before the body is complete.
+            # The length of a compressed body says nothing about what was written.
+            encoding = response.headers.get("Content-Encoding", "identity")
+            if "Content-Length" in response.headers and encoding == "identity":
+                expected_size = int(response.headers["Content-Length"])
+                if response.status_code == 206:
+                    written += offset
+                    expected_size += offset
+                if written != expected_size:
+                    self._discard(part)
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"{url} is {written} bytes, expected {expected_size}."
+                    )
+        hashes = {
+            hash_format: hasher.hexdigest() for hash_format, hasher in hashers.items()
+        }
+        return self._finish(part, hashes, state, formats)
+
+    def _download_segments(
+        self,
+        url: str,
+        part: Path,
+        state: dict,
+        progress: Optional[Callable] = None,
+        formats: tuple = ("sha256",),
+    ) -> tuple:
+        done = set(state["done"])
+        try:
+            network.download_segments(
+                url,
+                part,
+                state["size"],
+                state["validator"],
+                state["segments"],
+                done,
+                progress,
+            )
+        finally:
+            state["done"] = sorted(done)
+            self._write_state(part, state)
+        # the segments arrive out of order, so they can only be hashed once they're all there
+        return self._finish(part, hashing.hash_file(part, formats), state, formats)
+
+    def _finish(self, part: Path, hashes: dict, state: dict, formats: tuple) -> tuple:
+        missing = [hash_format for hash_format in formats if hash_format not in hashes]
+        if missing:
+            # murmur2 needs the length of the file before it can start
+            hashes.update(hashing.hash_file(part, missing))
+        part.with_suffix(".json").unlink(missing_ok=True)
+        return part, hashes, part.stat().st_size, state
+
+    def _store(
+        self, url: str, temp_path: Path, hashes: dict, size: int, headers: dict
+    ) -> dict:
+        digest = hashes["sha256"]
+        blob = self._blob(digest)
+        if blob.exists():
+            temp_path.unlink()
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, blob)
+        entry = {
+            "sha256": digest,
+            "size": size,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last_modified"),
+            "last_access": time.time(),
+        }
+        # the other hashes that were computed anyway, so a hit doesn't need to read the blob
+        others = {key: value for key, value in hashes.items() if key != "sha256"}
+        if others:
+            entry["hashes"] = others
+        self.index["entries"][url] = entry
+        return entry
+
+    def _matches(self, entry: dict, expected: tuple) -> bool:
+        hash_format, digest = expected
+        hash_format = hash_format.lower()
+        if hash_format == "sha256":
+            return hashing.matches(entry["sha256"], digest)
+        hashes = entry.setdefault("hashes", {})
+        if hash_format not in hashes:
+            # cached before anyone asked for this format
+            blob = self._blob(entry["sha256"])
+            hashes[hash_format] = hashing.hash_file(blob, (hash_format,))[hash_format]
+        return hashing.matches(hashes[hash_format], digest)
+
+    # PUBLIC
+
+    def fetch_path(
+        self,
+        url: str,
+        revalidate: bool = True,
+        progress: Optional[Callable] = None,
+        expected: Optional[tuple] = None,
+    ) -> Path:
+        """
+        Gets the path to the cached copy of `url`, downloading or revalidating it first.
+        If the network is unavailable, a previously cached copy is served as-is.
+
+        Args:
+            url (str): The URL to get.
+            revalidate (bool, optional): Whether to check a cached copy with the server. Defaults to True.
+            progress (Callable[[int, int], None], optional): Told about downloaded bytes, see `events.Stage.advance`. Defaults to None.
+            expected (tuple, optional): The format and value of the hash the file must have, e.g. ("sha1", "..."). A download that doesn't match is retried up to RETRIES times. Defaults to None.
+
+        Raises:
+            requests.exceptions.RequestException: If the download failed and nothing is cached.
+            hashing.HashMismatchError: If the file never matched the expected hash.
+
+        Returns:
+            Path: The path to the blob in the cache. Do not modify it.
+        """
+        with trace.span("fetch", "cache", url=url), _url_lock(url):
+            return self._fetch_path(url, revalidate, progress, expected)
+
+    def _fetch_path(
+        self,
+        url: str,
+        revalidate: bool,
+        progress: Optional[Callable],
+        expected: Optional[tuple],
+    ) -> Path:
+        with _lock:
+            entry = self._lookup(url)
+            # several installs in one process (e.g. install-batch) share artifacts, only the
+            # first one needs to check them with the server
+            fresh = time.monotonic() - self._validated.get(url, -FRESH_FOR) < FRESH_FOR
+        if (
+            entry is not None
+            and expected is not None
+            and not self._matches(entry, expected)
+        ):
+            # outdated, or corrupted on disk: the server's copy is the only one that'll do
+            logger.warning(f"Cached copy of {url} doesn't match, downloading it again.")
+            entry = None
+        if entry is not None and (fresh or not revalidate):
+            with _lock:
+                return self._hit(url, entry, revalidated=False)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        formats = (expected[0].lower(),) if expected is not None else ()
+        attempts = 1 + RETRIES if expected is not None else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                downloaded = self._download(url, headers, progress, formats)
+                revalidated = True
+            except requests.exceptions.RequestException:
+                if entry is None:
+                    raise
+                logger.warning(f"Could not revalidate {url}, using the cached copy.")
+                downloaded = None
+                revalidated = False
+            if downloaded is None or expected is None:
+                break
+            part, hashes = downloaded[:2]
+            actual = hashes[formats[0]]
+            if hashing.matches(actual, expected[1]):
+                break
+            # the file is complete but wrong, resuming it wouldn't help
+            self._discard(part)
+            message = f"{url} has {formats[0]} {actual}, expected {expected[1]}."
+            if attempt == attempts:
+                raise hashing.HashMismatchError(message)
+            logger.warning(f"{message} Downloading it again ({attempt}/{RETRIES}).")
+
+        with _lock:
+            if revalidated:
+                self._validated[url] = time.monotonic()
+            if downloaded is None:
+                return self._hit(url, entry, revalidated)
+            logger.debug(f"Cache miss for {url}")
+            self.index["stats"]["misses"] += 1
+            entry = self._store(url, *downloaded)
+            self.evict(keep=url)
+            self._save_index()
+            return self._blob(entry["sha256"])
+
+    def _hit(self, url: str, entry: dict, revalidated: bool) -> Path:
+        logger.debug(f"Cache hit for {url}")
+        stats = self.index["stats"]
+        stats["hits"] += 1
+        stats["bytes_saved"] += entry["size"]
+        if revalidated:
+            stats["revalidated"] += 1
+        entry["last_access"] = time.time()
+        self.index["entries"][url] = entry
+        self._save_index_later()
+        return self._blob(entry["sha256"])
+
+    def fetch(
+        self,
+        url: str,
+        revalidate: bool = True,
+        progress: Optional[Callable] = None,
+        expected: Optional[tuple] = None,
+    ) -> bytes:
+        """
+        Gets the content of `url` through the cache.
+
+        Args:
+            url (str): The URL to get.
+            revalidate (bool, optional): Whether to check a cached copy with the server. Defaults to True.
+            progress (Callable[[int, int], None], optional): Told about downloaded bytes, see `events.Stage.advance`. Defaults to None.
+            expected (tuple, optional): The format and value of the hash the file must have, see `fetch_path`. Defaults to None.
+
+        Returns:
+            bytes: The content.
+        """
+        return self.fetch_path(url, revalidate, progress, expected).read_bytes()
+
+    def evict(self, max_size: Optional[int] = None, keep: Optional[str] = None) -> int:
+        """
+        Evicts the least recently used entries until the cache fits in `max_size`.
+
+        Args:
+            max_size (int, optional): The size cap in bytes. Defaults to the cache's cap.
+            keep (str, optional): A URL that must not be evicted, e.g. the one just fetched.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        max_size = self.max_size if max_size is None else max_size
+        with _lock:
+            entries = self.index["entries"]
+            # blobs are shared between URLs with identical content: the size on disk counts
+            # each blob once, and a blob only goes away with the last entry that uses it
+            sizes = {}
+            references = {}
+            for entry in entries.values():
+                sizes[entry["sha256"]] = entry["size"]
+                references[entry["sha256"]] = references.get(entry["sha256"], 0) + 1
+            total = sum(sizes.values())
+            freed = 0
+            for url, entry in sorted(
+                entries.items(), key=lambda item: item[1]["last_access"]
+            ):
+                if total <= max_size:
+                    break
+                if url == keep:
+                    continue
+                del entries[url]
+                digest = entry["sha256"]
+                references[digest] -= 1
+                if references[digest] == 0:
+                    self._blob(digest).unlink(missing_ok=True)
+                    total -= sizes[digest]
+                    freed += sizes[digest]
+            return freed
+
+    def stats(self) -> dict:
+        """
+        Returns statistics about the cache.
+
+        Returns:
+            dict: The entries, size on disk, hits, misses, hit rate and bytes saved.
+        """
+        with _lock:
+            stats = dict(self.index["stats"])
+            entries = self.index["entries"]
+            lookups = stats["hits"] + stats["misses"]
+            stats["entries"] = len(entries)
+            stats["size"] = sum(
+                {entry["sha256"]: entry["size"] for entry in entries.values()}.values()
+            )
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            return stats
+
+    def clear(self) -> None:
+        """
+        Removes everything from the cache, including the statistics.
+        """
+        with _lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._dirty = False
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._index = None
+            self._validated.clear()
+
+
+_default_cache = None
+
+
+def get_cache() -> DownloadCache:
+    """
+    Returns the shared download cache.
+
+    Returns:
+        DownloadCache: The cache.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DownloadCache()
+    return _default_cache
+
+
+def fetch(
+    url: str, progress: Optional[Callable] = None, expected: Optional[tuple] = None
+) -> bytes:
+    """
+    Gets the content of `url` through the shared download cache.
+
+    Args:
+        url (str): The URL to get.
+        progress (Callable[[int, int], None], optional): Told about downloaded bytes, see `events.Stage.advance`. Defaults to None.
+        expected (tuple, optional): The format and value of the hash the file must have, see `DownloadCache.fetch_path`. Defaults to None.
+
+    Returns:
+        bytes: The content.
+    """
+    return get_cache().fetch(url, progress=progress, expected=expected)
+
+
+def fetch_path(
+    url: str, progress: Optional[Callable] = None, expected: Optional[tuple] = None
+) -> Path:
+    """
+    Gets the path to the cached copy of `url` from the shared download cache.
+
+    Args:
+        url (str): The URL to get.
+        progress (Callable[[int, int], None], optional): Told about downloaded bytes, see `events.Stage.advance`. Defaults to None.
+        expected (tuple, optional): The format and value of the hash the file must have, see `DownloadCache.fetch_path`. Defaults to None.
+
+    Returns:
+        Path: The path to the blob in the cache.
+    """
+    return get_cache().fetch_path(url, progress=progress, expected=expected)
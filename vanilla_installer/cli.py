@@ -10,18 +10,16 @@ import asyncio
 
 # import logging
 import sys
+import time
 import webbrowser
 
 # External
 import asyncclick as click
-import minecraft_launcher_lib as mll
 
 # Local
-try:
-    from vanilla_installer import gui as external_gui
-except ImportError:
-    pass
-from vanilla_installer import main
+# Everything else (requests, minecraft_launcher_lib, PySide6...) is imported by the
+# commands that need it, so `version` and `--help` start instantly.
+from vanilla_installer import __version__, log
 
 # logging.getLogger("asyncio").setLevel(logging.DEBUG)
 
@@ -29,8 +27,48 @@ from vanilla_installer import main
 @click.group(
     "vanilla-installer", context_settings=dict(help_option_names=["-h", "--help"])
 )
-async def vanilla_installer():
-    pass
+@click.option(
+    "--log-level",
+    "log_level",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False),
+    help=f"How much to write to the log file. Defaults to ${log.LEVEL_ENV}, or {log.DEFAULT_LEVEL}.",
+)
+@click.option(
+    "--mirror",
+    "mirror",
+    metavar="DIR_OR_URL",
+    help="Download everything from a local mirror instead of the internet, see `mirror sync`. Only works with the native engine. Defaults to the mirror config key.",
+)
+@click.option(
+    "--connections",
+    "connections",
+    type=click.IntRange(min=1),
+    help="How many connections to open to each server at once, which is also how many files are downloaded at once. Defaults to the connections_per_host config key.",
+)
+async def vanilla_installer(log_level, mirror, connections):
+    if log_level:
+        log.set_level(log_level)
+    if mirror is not None:
+        from vanilla_installer import network
+
+        network.set_mirror(mirror)
+    if connections is not None:
+        from vanilla_installer import network
+
+        network.configure(pool_maxsize=connections)
+
+
+def _check_engine(engine: str) -> None:
+    # packwiz-installer downloads the mods itself, from the internet
+    if engine == "java":
+        from vanilla_installer import network
+
+        if network.get_mirror():
+            click.echo(
+                "The Java engine can't install from a mirror, use --engine native.",
+                err=True,
+            )
+            sys.exit(1)
 
 
 @vanilla_installer.command(
@@ -54,41 +92,142 @@ async def vanilla_installer():
     "java_ver",
     help="The version of Java to use. Defaults to the correct version based on --version. Can be 8, 16, 17.1, or 17.3. THIS IS A DEBUG OPTION, DO NOT USE IF YOU DON'T KNOW WHAT YOU'RE DOING.",
 )
-async def install(minecraft_dir, version, java_ver):
+@click.option(
+    "--engine",
+    "-e",
+    "engine",
+    type=click.Choice(["native", "java"]),
+    default="native",
+    show_default=True,
+    help="How to install the pack: natively, or with packwiz-installer on Java. A mirror only works with the native engine.",
+)
+@click.option(
+    "--icon",
+    "-i",
+    "icon",
+    type=click.Path(exists=True, dir_okay=False),
+    help="An image to use as the icon of the launcher profile.",
+)
+@click.option(
+    "--launcher-dir",
+    "-l",
+    "launcher_dir",
+    type=click.Path(file_okay=False),
+    help="The directory of the launcher, where Fabric and the profile are installed. Defaults to the default directory based on your OS.",
+)
+@click.option(
+    "--trace",
+    "trace_file",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Record where the time goes to this file, in the Chrome trace format. Open it in chrome://tracing or ui.perfetto.dev.",
+)
+async def install(
+    minecraft_dir, version, java_ver, engine, icon, launcher_dir, trace_file
+):
+    import minecraft_launcher_lib as mll
+
+    from vanilla_installer import main, trace
+
+    _check_engine(engine)
+    if trace_file is not None:
+        trace.start()
+
     if minecraft_dir is None or minecraft_dir == "":
         minecraft_dir = mll.utils.get_minecraft_directory()
     if version is None or version == "":
         version = main.newest_version()
     if java_ver is None or java_ver == "" or java_ver not in [8, 16, 17.1, 17.3]:
-        if version.startswith("1.16"):
-            java_ver = 8
-        elif version.startswith("1.17"):
-            java_ver = 16
-        else:
-            java_ver = 17.3
+        java_ver = main.java_for_version(version)
     try:
-        await main.run(minecraft_dir, version, java_ver, "CLI")
-    except TypeError:
-        pass
+        installed = await main.run_async(
+            minecraft_dir,
+            version,
+            java_ver,
+            "CLI",
+            engine=engine,
+            icon=icon,
+            launcher_dir=launcher_dir,
+        )
+    except TypeError as e:
+        # raised by convert_version for unsupported versions
+        click.echo(str(e), err=True)
+        sys.exit(1)
+    finally:
+        if trace_file is not None:
+            recorded = trace.stop(trace_file)
+            click.echo(f"Wrote {len(recorded)} trace events to {trace_file}.")
+    if not installed:
+        sys.exit(1)
+
+
+@vanilla_installer.command(
+    "install-batch",
+    help="Install Fabulously Optimized to every directory listed in a TOML or JSON manifest.",
+)
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--workers",
+    "-w",
+    "workers",
+    type=click.IntRange(min=1),
+    help="How many directories to install to at once. Defaults to 4.",
+)
+@click.option(
+    "--engine",
+    "-e",
+    "engine",
+    type=click.Choice(["native", "java"]),
+    default="native",
+    show_default=True,
+    help="How to install the pack: natively, or with packwiz-installer on Java. A mirror only works with the native engine.",
+)
+@click.option(
+    "--launcher-dir",
+    "-l",
+    "launcher_dir",
+    type=click.Path(file_okay=False),
+    help="The directory of the launcher, where Fabric and the profile are installed. Defaults to the default directory based on your OS.",
+)
+async def install_batch(manifest, workers, engine, launcher_dir):
+    from vanilla_installer import batch
+
+    _check_engine(engine)
+    try:
+        instances = batch.load_manifest(manifest)
+    except ValueError as e:
+        click.echo(f"Invalid manifest: {e}", err=True)
+        sys.exit(1)
+    start = time.perf_counter()
+    results = batch.run(instances, workers or batch.WORKERS, engine, launcher_dir)
+    total = time.perf_counter() - start
+
+    click.echo("")
+    for result in results:
+        status = "ok" if result.success else f"FAILED: {result.error}"
+        click.echo(
+            f"{result.duration:8.2f}s  {result.instance.minecraft_dir}  {status}"
+        )
+    failed = sum(not result.success for result in results)
+    click.echo(
+        f"Installed {len(results) - failed} of {len(results)} instances in {total:.2f}s."
+    )
+    if failed:
+        sys.exit(1)
 
 
 @vanilla_installer.command("version", help="Show the version number and exit.")
 async def version():
-    version = main.get_version()
-    click.echo(f"Vanilla Installer {version}")
+    click.echo(f"Vanilla Installer {__version__}")
 
 
 @vanilla_installer.command("gui", help="Launch the GUI.", deprecated=True)
 async def gui():
     try:
-        if external_gui:
-            pass
-        else:
-            pass
-    except NameError:
+        from vanilla_installer import gui as external_gui
+    except ImportError:
         click.echo("The GUI is not installed, so this command will not function.")
         sys.exit(1)
-    click.echo(f"Running Vanilla Installer-GUI {main.get_version()}")
+    click.echo(f"Running Vanilla Installer-GUI {__version__}")
     try:
         await external_gui.run()
     except TypeError:
@@ -98,6 +237,80 @@ async def gui():
     )
 
 
+@vanilla_installer.group("cache", help="Manage the download cache.")
+async def cache():
+    pass
+
+
+@cache.command("stats", help="Show how effective the download cache is.")
+async def cache_stats():
+    from vanilla_installer import cache as download_cache
+
+    stats = download_cache.get_cache().stats()
+    click.echo(f"Cache directory: {download_cache.get_cache().path}")
+    click.echo(f"Entries: {stats['entries']} ({stats['size'] / 1024 / 1024:.2f} MiB)")
+    click.echo(
+        f"Hits: {stats['hits']} ({stats['revalidated']} revalidated), misses: {stats['misses']}"
+    )
+    click.echo(f"Hit rate: {stats['hit_rate']:.1%}")
+    click.echo(f"Bytes saved: {stats['bytes_saved'] / 1024 / 1024:.2f} MiB")
+
+
+@cache.command("clear", help="Remove everything from the download cache.")
+async def cache_clear():
+    from vanilla_installer import cache as download_cache
+
+    download_cache.get_cache().clear()
+    click.echo("Cleared the download cache.")
+
+
+@vanilla_installer.group("mirror", help="Manage a local mirror for offline installs.")
+async def mirror():
+    pass
+
+
+@mirror.command(
+    "sync",
+    help="Download everything an install needs into DIRECTORY. Serve it, or pass it to --mirror directly.",
+)
+@click.argument("directory", type=click.Path(file_okay=False))
+@click.option(
+    "--version",
+    "-v",
+    "mc_versions",
+    multiple=True,
+    help="A Minecraft version to mirror, can be given more than once. Defaults to every supported version.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    "workers",
+    type=click.IntRange(min=1),
+    help="How many files to download at once. Defaults to 8.",
+)
+async def mirror_sync(directory, mc_versions, workers):
+    import requests
+
+    from vanilla_installer import mirror as local_mirror
+    from vanilla_installer import packwiz
+
+    start = time.perf_counter()
+    try:
+        count = local_mirror.sync(
+            directory, list(mc_versions), workers or local_mirror.WORKERS
+        )
+    except (
+        ValueError,
+        requests.exceptions.RequestException,
+        packwiz.PackwizError,
+    ) as e:
+        click.echo(f"Could not sync the mirror: {e}", err=True)
+        sys.exit(1)
+    click.echo(
+        f"Mirrored {count} files to {directory} in {time.perf_counter() - start:.2f}s."
+    )
+
+
 @vanilla_installer.group("about", help="Shows information about the program.")
 async def about():
     pass
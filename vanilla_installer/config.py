@@ -3,9 +3,11 @@
 """
 The Configuration System for Vanilla Installer.
 """
+import atexit
 import logging
 import os
 import platform
+import threading
 from pathlib import Path
 
 import minecraft_launcher_lib as mll
@@ -17,6 +19,20 @@ from vanilla_installer import log
 logger = log.setup_logging()
 
 FILE_PATH = str(Path("vanilla_installer.toml").resolve())
+FLUSH_DELAY = 0.5  # seconds
+
+_lock = threading.RLock()
+_document = None  # the parsed config file
+_stat = None  # (mtime, size) of the config file when it was parsed
+_dirty = False  # whether _document has changes that aren't on disk yet
+_flush_timer = None
+
+# Keys that were added after the first release, with their default value.
+# Config files written before then don't have them, so they're added on the first write.
+DEFAULTS = {
+    "mirror": "",
+    "connections_per_host": 8,
+}
 
 
 def init():
@@ -45,6 +61,18 @@ def init():
         )
     )
     config.add("font", font)
+    config.add(
+        tomlkit.comment(
+            "A folder or URL to download everything from instead of the internet, see `vanilla-installer mirror sync`."
+        )
+    )
+    config.add("mirror", DEFAULTS["mirror"])
+    config.add(
+        tomlkit.comment(
+            "How many connections to open to each server at once, which is also how many files are downloaded at once."
+        )
+    )
+    config.add("connections_per_host", DEFAULTS["connections_per_host"])
 
     config_file.add("config", config)
     file = toml_file.TOMLFile(FILE_PATH)
@@ -56,38 +84,103 @@ def init():
         file.write(config_file)
 
 
+def _file_stat():
+    try:
+        stat = os.stat(FILE_PATH)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 def read() -> dict:
     """
     Read from the config file.
+    The parsed file is cached, and only parsed again when its modification time or size change.
+    Don't modify the returned document, use `write` instead.
 
     Returns:
         dict: The config file, reformatted into a dict-like format.
     """
-    config_file = toml_file.TOMLFile(FILE_PATH)
-    try:
-        return config_file.read()
-    except FileNotFoundError:
-        logger.exception("No config file found, (re-)initializing.")
-        init()
-        return config_file.read()
+    global _document, _stat
+    with _lock:
+        if _dirty:
+            # pending writes are newer than whatever is on disk
+            return _document
+        stat = _file_stat()
+        if stat is None:
+            logger.exception("No config file found, (re-)initializing.")
+            init()
+            stat = _file_stat()
+        if _document is None or stat != _stat:
+            _document = toml_file.TOMLFile(FILE_PATH).read()
+            _stat = stat
+        return _document
 
 
 def write(key: str, value: str) -> None:
     """
     Write to the config file.
     This is a mostly internal function used to write to the config file from a user interface.
+    The change is visible to `read` immediately, but only written to disk after `FLUSH_DELAY`,
+    so several writes in a row end up as a single write. See `flush`.
 
     Args:
         key (str): The key to write to.
         value (str): The value to write to `key`.
     """
-    config_file = read()
-    try:
-        # as this is the only category we use right now, this is hardcoded
-        config_file["config"][key]
-    except KeyError as e:
-        logger.critical("Could not find key.")
-        raise KeyError("Invalid key.") from e
-    # read 5 lines above
-    config_file["config"][key] = value
-    toml_file.TOMLFile(FILE_PATH).write(config_file)
+    global _dirty, _flush_timer
+    with _lock:
+        config_file = read()
+        try:
+            # as this is the only category we use right now, this is hardcoded
+            config_file["config"][key]
+        except KeyError as e:
+            if key not in DEFAULTS:
+                logger.critical("Could not find key.")
+                raise KeyError("Invalid key.") from e
+        # read 5 lines above
+        config_file["config"][key] = value
+        _dirty = True
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_DELAY, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def get(key: str):
+    """
+    Gets a single value from the config file.
+    Unlike `read`, this doesn't create the config file if there is none.
+
+    Args:
+        key (str): The key to get.
+
+    Returns:
+        The value, or its default from `DEFAULTS` if it isn't set. None for unknown keys.
+    """
+    with _lock:
+        if not _dirty and _file_stat() is None:
+            return DEFAULTS.get(key)
+        return read()["config"].get(key, DEFAULTS.get(key))
+
+
+def flush() -> None:
+    """
+    Writes pending changes to the config file, replacing it atomically.
+    This runs automatically shortly after `write` and when the program exits.
+    """
+    global _dirty, _flush_timer, _stat
+    with _lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if not _dirty:
+            return
+        temp_path = f"{FILE_PATH}.tmp"
+        toml_file.TOMLFile(temp_path).write(_document)
+        os.replace(temp_path, FILE_PATH)
+        _stat = _file_stat()
+        _dirty = False
+
+
+atexit.register(flush)
@@ -0,0 +1,390 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Progress events of an install, and the subscribers that show them.
+
+`main.run` reports what it's doing to a `Bus`: stages starting and finishing, bytes
+downloaded, messages and errors. Stages and events are emitted from worker threads, so
+subscribers must not touch widgets directly (see `gui.InstallQueue`). Each subscriber has its
+own rate limit: progress events in between are coalesced into the latest one per stage,
+every other event is delivered right away.
+
+An install is cancelled with `Bus.cancel`: the next time one of its threads reports progress
+or starts a stage, `Cancelled` is raised there.
+"""
+import contextvars
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional, TextIO
+
+from vanilla_installer import log, trace
+
+logger = log.setup_logging()
+
+# the stage the current thread or task is reporting to, see `current_progress`
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+# the bus of the install running in the current thread or task, see `current`
+_current_bus = contextvars.ContextVar("current_bus", default=None)
+
+
+@dataclass(frozen=True)
+class Event:
+    stage: str
+
+
+@dataclass(frozen=True)
+class StageStarted(Event):
+    description: str
+
+
+@dataclass(frozen=True)
+class Progress(Event):
+    done: int  # bytes
+    total: int  # bytes, 0 if unknown
+
+
+@dataclass(frozen=True)
+class StageFinished(Event):
+    duration: float  # seconds
+    success: bool = True
+
+
+@dataclass(frozen=True)
+class Message(Event):
+    text: str
+    level: str = "info"  # "info", "success", "warn" or "error"
+
+
+@dataclass(frozen=True)
+class Error(Event):
+    error: str
+
+
+class Cancelled(BaseException):
+    """
+    Raised in the threads of an install that was cancelled, see `Bus.cancel`.
+    Like KeyboardInterrupt, it isn't an Exception, so the `except Exception` that turns errors
+    into messages doesn't catch it.
+    """
+
+
+class _Subscription:
+    def __init__(self, callback: Callable[[Event], None], interval: float):
+        self.callback = callback
+        self.interval = interval
+        self._last = 0.0
+        self._pending = {}  # stage -> the latest Progress that wasn't delivered yet
+        self._lock = threading.Lock()
+
+    def deliver(self, event: Event) -> None:
+        with self._lock:
+            if isinstance(event, Progress):
+                now = time.monotonic()
+                if now - self._last < self.interval:
+                    self._pending[event.stage] = event
+                    return
+                self._last = now
+                self._pending.pop(event.stage, None)
+                events = [event]
+            else:
+                # whatever happens next, show the progress that led up to it first
+                events = list(self._pending.values()) + [event]
+                self._pending.clear()
+        for pending in events:
+            try:
+                self.callback(pending)
+            except Exception:
+                logger.exception(f"Could not deliver {pending} to {self.callback}.")
+
+
+class Stage:
+    """
+    A stage of an install, e.g. installing Fabric. Counts the bytes downloaded in it.
+    Use `Bus.stage` to create one.
+    """
+
+    def __init__(self, bus: "Bus", name: str):
+        self.bus = bus
+        self.name = name
+        self.done = 0
+        self.total = 0
+        self.error = None  # set by `fail`
+        self._lock = threading.Lock()
+
+    def advance(self, done: int = 0, total: int = 0) -> None:
+        """
+        Adds to the bytes downloaded and the bytes expected. Safe to call from any thread.
+
+        Args:
+            done (int, optional): Bytes that were just downloaded. Defaults to 0.
+            total (int, optional): Bytes that were just found out to be needed, e.g. from a Content-Length. Defaults to 0.
+
+        Raises:
+            Cancelled: If the install was cancelled.
+        """
+        self.bus.check()
+        with self._lock:
+            self.done += done
+            self.total += total
+            event = Progress(self.name, self.done, self.total)
+        self.bus.emit(event)
+
+    def fail(self, error: str) -> None:
+        """
+        Marks the stage as failed without raising, for steps that report errors as a return value.
+        Error and an unsuccessful StageFinished are emitted when the stage ends.
+
+        Args:
+            error (str): What went wrong, for humans.
+        """
+        self.error = error
+
+
+class Bus:
+    """Delivers the events of one install to its subscribers."""
+
+    def __init__(self):
+        self._subscriptions = []
+        self._cancelled = threading.Event()
+
+    def subscribe(
+        self, callback: Callable[[Event], None], interval: float = 0.0
+    ) -> None:
+        """
+        Calls `callback` with every event.
+
+        Args:
+            callback (Callable[[Event], None]): The subscriber. It's called from the thread that emitted the event.
+            interval (float, optional): The minimum time between two progress events, in seconds. Defaults to 0.0.
+        """
+        self._subscriptions.append(_Subscription(callback, interval))
+
+    def emit(self, event: Event) -> None:
+        """
+        Sends an event to every subscriber.
+
+        Args:
+            event (Event): The event.
+        """
+        for subscription in self._subscriptions:
+            subscription.deliver(event)
+
+    def cancel(self) -> None:
+        """
+        Cancels the install. It stops the next time it reports progress or starts a stage.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the install was cancelled."""
+        return self._cancelled.is_set()
+
+    def check(self) -> None:
+        """
+        Raises Cancelled if the install was cancelled.
+
+        Raises:
+            Cancelled: If the install was cancelled.
+        """
+        if self._cancelled.is_set():
+            raise Cancelled()
+
+    def message(
+        self, text: str, level: str = "info", stage: Optional[str] = None
+    ) -> None:
+        """
+        Sends a message to every subscriber.
+
+        Args:
+            text (str): The message.
+            level (str, optional): "info", "success", "warn" or "error". Defaults to "info".
+            stage (str, optional): The stage it's about. Defaults to the current stage.
+        """
+        if stage is None:
+            current = _current_stage.get()
+            stage = current.name if current is not None else ""
+        self.emit(Message(stage, text, level))
+
+    @contextmanager
+    def stage(self, name: str, description: str):
+        """
+        Runs a stage: emits StageStarted, then StageFinished with its duration when the block ends,
+        or Error and an unsuccessful StageFinished if it raised or `Stage.fail` was called. In the block (and in threads started
+        with `asyncio.to_thread` from it), `current_progress` reports to this stage.
+
+        Args:
+            name (str): A short name for the stage, e.g. "fabric".
+            description (str): What the stage does, for humans.
+
+        Raises:
+            Cancelled: If the install was cancelled.
+
+        Yields:
+            Stage: The stage.
+        """
+        self.check()
+        stage = Stage(self, name)
+        stage_token = _current_stage.set(stage)
+        bus_token = _current_bus.set(self)
+        self.emit(StageStarted(name, description))
+        start = time.perf_counter()
+        # stages run side by side in the event loop's thread, so they're traced as overlapping
+        try:
+            with trace.span(name, "stage", overlapping=True, description=description):
+                yield stage
+        except Cancelled:
+            self.emit(StageFinished(name, time.perf_counter() - start, False))
+            raise
+        except BaseException as e:
+            self.emit(Error(name, str(e) or type(e).__name__))
+            self.emit(StageFinished(name, time.perf_counter() - start, False))
+            raise
+        else:
+            if stage.error is not None:
+                self.emit(Error(name, stage.error))
+            self.emit(
+                StageFinished(name, time.perf_counter() - start, stage.error is None)
+            )
+        finally:
+            _current_stage.reset(stage_token)
+            _current_bus.reset(bus_token)
+
+
+def current() -> Optional[Bus]:
+    """
+    Gets the bus of the install running in this thread or task.
+
+    Returns:
+        Bus | None: The bus, or None outside of a stage.
+    """
+    return _current_bus.get()
+
+
+def current_progress() -> Optional[Callable[[int, int], None]]:
+    """
+    Gets a callback to report downloaded bytes to the current stage.
+    Thread pools don't inherit the current stage, so get this before handing work to one.
+
+    Returns:
+        Callable[[int, int], None] | None: `Stage.advance` of the current stage, or None outside of a stage.
+    """
+    stage = _current_stage.get()
+    return stage.advance if stage is not None else None
+
+
+# SUBSCRIBERS
+
+
+def log_sink(bus: Bus, interval: float = 1.0) -> None:
+    """
+    Writes the events of a bus to the log.
+
+    Args:
+        bus (Bus): The bus.
+        interval (float, optional): The minimum time between two progress lines, in seconds. Defaults to 1.0.
+    """
+    levels = {"fg": logging.DEBUG, "warn": logging.WARNING, "error": logging.ERROR}
+
+    def sink(event: Event) -> None:
+        if isinstance(event, Message):
+            logger.log(levels.get(event.level, logging.INFO), event.text)
+        elif isinstance(event, StageStarted):
+            logger.info(event.description)
+        elif isinstance(event, Progress):
+            logger.debug(
+                f"Stage {event.stage}: {format_bytes(event.done)} of {format_bytes(event.total)}"
+            )
+        elif isinstance(event, StageFinished):
+            outcome = "finished" if event.success else "failed"
+            logger.info(f"Stage {event.stage} {outcome} in {event.duration:.2f}s.")
+        elif isinstance(event, Error):
+            logger.error(f"Stage {event.stage} failed: {event.error}")
+
+    bus.subscribe(sink, interval)
+
+
+def format_bytes(size: float) -> str:
+    """
+    Formats a number of bytes for humans.
+
+    Args:
+        size (float): The number of bytes.
+
+    Returns:
+        str: e.g. "12.3 MiB".
+    """
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class ProgressRenderer:
+    """
+    Shows the events of a bus in a terminal: messages as lines, and the progress of the
+    stage that last made progress as a bar with the throughput and ETA.
+    """
+
+    WIDTH = 24
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        # sys.__stderr__ so the bar isn't copied into the log file line by line
+        self.stream = stream or sys.__stderr__
+        self.interactive = self.stream.isatty()
+        self._started = {}  # stage -> time.monotonic() when it started
+        self._bar_shown = False
+        self._lock = threading.Lock()
+
+    def _clear_bar(self) -> None:
+        if self._bar_shown:
+            self.stream.write("\r\033[K")
+            self._bar_shown = False
+
+    def _bar(self, event: Progress) -> str:
+        elapsed = time.monotonic() - self._started.get(event.stage, time.monotonic())
+        speed = event.done / elapsed if elapsed > 0 else 0
+        text = f"{event.stage}: {format_bytes(event.done)}"
+        if event.total:
+            fraction = min(event.done / event.total, 1)
+            filled = round(fraction * self.WIDTH)
+            bar = "#" * filled + "-" * (self.WIDTH - filled)
+            text = f"[{bar}] {fraction:4.0%} {text} of {format_bytes(event.total)}"
+            if speed and event.done < event.total:
+                text += f", ETA {(event.total - event.done) / speed:.0f}s"
+        if speed:
+            text += f" at {format_bytes(speed)}/s"
+        return text
+
+    def __call__(self, event: Event) -> None:
+        with self._lock:
+            if isinstance(event, StageStarted):
+                self._started[event.stage] = time.monotonic()
+                self._clear_bar()
+                sys.__stdout__.write(event.description + "\n")
+                sys.__stdout__.flush()
+            elif isinstance(event, Progress):
+                if self.interactive:
+                    self._clear_bar()
+                    self.stream.write(self._bar(event))
+                    self._bar_shown = True
+            elif isinstance(event, Message):
+                self._clear_bar()
+                # messages go to stdout like click.echo did, errors to stderr
+                stream = sys.__stderr__ if event.level == "error" else sys.__stdout__
+                stream.write(event.text + "\n")
+                stream.flush()
+            elif isinstance(event, Error):
+                self._clear_bar()
+            self.stream.flush()
+
+    def close(self) -> None:
+        """Removes the progress bar, if it's shown."""
+        with self._lock:
+            self._clear_bar()
+            self.stream.flush()
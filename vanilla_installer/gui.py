@@ -10,12 +10,30 @@ import pathlib
 import platform
 import sys
 import webbrowser
-from time import sleep
+from typing import Optional
 
 import minecraft_launcher_lib as mll
-from PySide6.QtCore import QCoreApplication, QRect, QRunnable, Qt, QThreadPool, Slot
-from PySide6.QtGui import QFontDatabase, QIcon
-from PySide6.QtSvgWidgets import QSvgWidget
+from PySide6.QtCore import (
+    QCoreApplication,
+    QObject,
+    QRect,
+    QRunnable,
+    Qt,
+    QThreadPool,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import (
+    QColor,
+    QFontDatabase,
+    QIcon,
+    QImage,
+    QPainter,
+    QPixmap,
+    QPixmapCache,
+)
+from PySide6.QtSvg import QSvgRenderer
 from PySide6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -23,7 +41,6 @@ from PySide6.QtWidgets import (
     QDialog,
     QDialogButtonBox,
     QFileDialog,
-    QGraphicsColorizeEffect,
     QLabel,
     QMainWindow,
     QPushButton,
@@ -32,7 +49,7 @@ from PySide6.QtWidgets import (
 )
 
 # LOCAL
-from vanilla_installer import config, i18n, log, main, theme
+from vanilla_installer import cache, config, events, i18n, log, main, theme, versions
 
 logger = log.setup_logging()
 
@@ -42,8 +59,9 @@ def run() -> None:
     Runs the GUI.
     """
     global global_font
-    if config.read()["config"]["font"]:
-        setFont(config.read()["config"]["font"] == "OpenDyslexic")
+    font = config.read()["config"]["font"]
+    if font:
+        setFont(font == "OpenDyslexic")
     else:
         setFont(False)
     try:
@@ -59,10 +77,14 @@ def run() -> None:
     window = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(window)
-    get_versions_worker = Worker(ui.addVersions)
-    ui.threadpool.start(get_versions_worker)
+    # the versions we know of are already shown, check for new ones without blocking the window
+    ui.threadpool.start(Worker(ui.versionLoader.refresh))
     window.show()
     app.exec()
+    # closing the window stops the installs instead of waiting for them to finish
+    ui.installQueue.cancelAll()
+    ui.installQueue.pool.waitForDone()
+    config.flush()
 
 
 def setFont(opendyslexic: bool):
@@ -81,6 +103,91 @@ def setFont(opendyslexic: bool):
     config.write("font", global_font)
 
 
+def applyStyle() -> None:
+    """
+    Applies the theme and font to the whole application, see `theme.stylesheet`.
+    """
+    QApplication.instance().setStyleSheet(
+        theme.stylesheet(theme.is_dark(), global_font)
+    )
+
+
+def tintedPixmap(asset: str, color: str, size: int, ratio: float = 1.0) -> QPixmap:
+    """
+    Renders an SVG from the assets in a single colour, at a size and device pixel ratio.
+    Each pixmap is rendered once: it's kept in QPixmapCache, and as a PNG in the cache folder
+    for the next start.
+
+    Args:
+        asset (str): The file name of the SVG, e.g. "flag.svg".
+        color (str): The colour, e.g. "#9399b2".
+        size (int): The size in device-independent pixels.
+        ratio (float, optional): The device pixel ratio. Defaults to 1.0.
+
+    Returns:
+        QPixmap: The pixmap.
+    """
+    source = pathlib.Path(Ui_MainWindow.getAsset(asset))
+    pixels = round(size * ratio)
+    # the modification time of the asset, so a changed icon isn't taken from the disk cache
+    version = source.stat().st_mtime_ns
+    key = f"{source.stem}-{color.lstrip('#')}-{pixels}-{version}"
+    pixmap = QPixmap()
+    if not QPixmapCache.find(key, pixmap):
+        cached_path = cache.get_cache().path / "gui-icons" / f"{key}.png"
+        if not pixmap.load(str(cached_path)):
+            image = QImage(pixels, pixels, QImage.Format_ARGB32_Premultiplied)
+            image.fill(Qt.transparent)
+            painter = QPainter(image)
+            QSvgRenderer(str(source)).render(painter)
+            # keep the shape, replace the colour
+            painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
+            painter.fillRect(image.rect(), QColor(color))
+            painter.end()
+            cached_path.parent.mkdir(parents=True, exist_ok=True)
+            image.save(str(cached_path))
+            pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(key, pixmap)
+    pixmap.setDevicePixelRatio(ratio)
+    return pixmap
+
+
+def tintedIcon(asset: str, color: str, size: int) -> QIcon:
+    """
+    Gets an SVG from the assets as an icon in a single colour, see `tintedPixmap`.
+
+    Args:
+        asset (str): The file name of the SVG, e.g. "flag.svg".
+        color (str): The colour, e.g. "#9399b2".
+        size (int): The size in device-independent pixels.
+
+    Returns:
+        QIcon: The icon, with pixmaps for normal and for the current screen's density.
+    """
+    icon = QIcon()
+    for ratio in sorted({1.0, QApplication.instance().devicePixelRatio()}):
+        icon.addPixmap(tintedPixmap(asset, color, size, ratio))
+    return icon
+
+
+def iconLabel(parent: QWidget, asset: Optional[str] = None) -> QLabel:
+    """
+    Creates a label to show an icon on a button. The icon is set by `Ui_MainWindow.reloadTheme`.
+
+    Args:
+        parent (QWidget): The button.
+        asset (str, optional): The file name of the SVG. Defaults to None, for icons that depend on the theme.
+
+    Returns:
+        QLabel: The label.
+    """
+    label = QLabel(parent)
+    label.setProperty("asset", asset)
+    # clicks go to the button
+    label.setAttribute(Qt.WA_TransparentForMouseEvents)
+    return label
+
+
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow: QMainWindow) -> None:
         """Setup the PySide6 (aka Qt) UI.
@@ -94,7 +201,17 @@ class Ui_MainWindow(object):
         MainWindow.setMinimumSize(600, 400)
 
         self.threadpool = QThreadPool(MainWindow)
-        self.installing = False
+        # created here, so it lives in the UI thread and its signals are delivered there
+        self.installQueue = InstallQueue(MainWindow)
+        self.installQueue.jobEvent.connect(self.showEvent)
+        self.installQueue.jobFinished.connect(self.jobFinished)
+        # shows the subtitle again a while after the last install finished
+        self.resetTimer = QTimer(MainWindow)
+        self.resetTimer.setSingleShot(True)
+        self.resetTimer.setInterval(3500)
+        self.resetTimer.timeout.connect(self.resetSubtitle)
+        self.versionLoader = VersionLoader(MainWindow)
+        self.versionLoader.loaded.connect(self.setVersions)
 
         self.centralwidget = QWidget(MainWindow)
         self.centralwidget.setObjectName("centralwidget")
@@ -109,11 +226,10 @@ class Ui_MainWindow(object):
         self.installButton = QPushButton(self.centralwidget)
         self.installButton.setObjectName("installButton")
         self.installButton.setGeometry(QRect(225, 164, 150, 50))
-        self.installButton.clicked.connect(
-            lambda: self.threadpool.start(Worker(self.startInstall))
-        )
+        self.installButton.clicked.connect(self.startInstall)
         self.versionSelector = QComboBox(self.centralwidget)
         self.versionSelector.setObjectName("versionSelector")
+        self.setVersions(versions.cached())
         self.versionSelector.setGeometry(QRect(355, 240, 120, 20))
         self.versionLabel = QLabel(self.centralwidget)
         self.versionLabel.setObjectName("versionLabel")
@@ -128,9 +244,7 @@ class Ui_MainWindow(object):
                 "https://fabulously-optimized.gitbook.io/modpack/readme/version-support"
             )
         )
-        self.versionHelpIcon = QSvgWidget(
-            Ui_MainWindow.getAsset("help.svg"), self.versionHelp
-        )
+        self.versionHelpIcon = iconLabel(self.versionHelp, "help.svg")
         self.versionHelpIcon.setGeometry(QRect(0, 0, 20, 20))
         self.locationLabel = QLabel(self.centralwidget)
         self.locationLabel.setObjectName("locationLabel")
@@ -155,9 +269,7 @@ class Ui_MainWindow(object):
         self.locationSelector.clicked.connect(
             lambda: self.selectDirectory(self.centralwidget)
         )
-        self.locationSelectorIcon = QSvgWidget(
-            Ui_MainWindow.getAsset("folder.svg"), self.locationSelector
-        )
+        self.locationSelectorIcon = iconLabel(self.locationSelector, "folder.svg")
         self.locationSelectorIcon.setGeometry(5, 5, 20, 20)
 
         self.infoButton = QPushButton(self.centralwidget)
@@ -169,9 +281,7 @@ class Ui_MainWindow(object):
                 "https://github.com/Fabulously-Optimized/vanilla-installer/"
             )
         )
-        self.infoButtonIcon = QSvgWidget(
-            Ui_MainWindow.getAsset("github.svg"), self.infoButton
-        )
+        self.infoButtonIcon = iconLabel(self.infoButton, "github.svg")
         self.infoButtonIcon.setGeometry(0, 0, 24, 24)
 
         self.issuesButton = QPushButton(self.centralwidget)
@@ -183,9 +293,7 @@ class Ui_MainWindow(object):
                 "https://github.com/Fabulously-Optimized/vanilla-installer/issues"
             )
         )
-        self.issuesButtonIcon = QSvgWidget(
-            Ui_MainWindow.getAsset("flag.svg"), self.issuesButton
-        )
+        self.issuesButtonIcon = iconLabel(self.issuesButton, "flag.svg")
         self.issuesButtonIcon.setGeometry(0, 0, 24, 24)
 
         self.themeToggle = QPushButton(self.centralwidget)
@@ -193,7 +301,7 @@ class Ui_MainWindow(object):
         self.themeToggle.setGeometry(QRect(456, 366, 134, 24))
         self.themeToggle.setFlat(True)
         self.themeToggle.clicked.connect(self.toggleTheme)
-        self.themeToggleIcon = QSvgWidget(self.themeToggle)
+        self.themeToggleIcon = iconLabel(self.themeToggle)
         self.themeToggleIcon.setGeometry(110, 0, 24, 24)
 
         self.settingsButton = QPushButton(self.centralwidget)
@@ -201,19 +309,17 @@ class Ui_MainWindow(object):
         self.settingsButton.setGeometry(QRect(496, 332, 94, 24))
         self.settingsButton.setFlat(True)
         self.settingsButton.clicked.connect(self.openSettings)
-        self.settingsButtonIcon = QSvgWidget(
-            Ui_MainWindow.getAsset("settings.svg"), self.settingsButton
-        )
+        self.settingsButtonIcon = iconLabel(self.settingsButton, "settings.svg")
         self.settingsButtonIcon.setGeometry(70, 0, 24, 24)
 
         self.windowIcon = Ui_MainWindow.getAsset("icon.png")
         MainWindow.setWindowIcon(QIcon(self.windowIcon))
 
-        self.reloadTheme()
-
         MainWindow.setCentralWidget(self.centralwidget)
 
         self.retranslateUi(MainWindow)
+        self.reloadTheme()
+        self.selectedLocation.textChanged.connect(self.updateInstallButton)
 
     def retranslateUi(self, MainWindow: QMainWindow) -> None:
         """Retranslate the UI.
@@ -234,11 +340,8 @@ class Ui_MainWindow(object):
                 "MainWindow", i18n_strings["vanilla_installer.gui.subtitle"], None
             )
         )
-        self.installButton.setText(
-            QCoreApplication.translate(
-                "MainWindow", i18n_strings["vanilla_installer.gui.install_button"], None
-            )
-        )
+        self.i18n_strings = i18n_strings
+        self.updateInstallButton()
         self.versionLabel.setText(
             QCoreApplication.translate(
                 "MainWindow", i18n_strings["vanilla_installer.gui.mc_version"], None
@@ -274,88 +377,44 @@ class Ui_MainWindow(object):
 
     def reloadTheme(self) -> None:
         """Reload the theme. Doesn't take any arguments."""
-        loaded_theme = theme.load()
-        self.centralwidget.setStyleSheet(
-            f'[objectName^="centralwidget"] {{ background-color: { loaded_theme.get("base")} }}'
-        )
-        self.title.setStyleSheet(
-            f'color: { loaded_theme.get("text")}; font: 24pt "{global_font}"'
-        )
-        self.subtitle.setStyleSheet(
-            f'color: { loaded_theme.get("subtitle") }; font: 15pt "{global_font}"'
-        )
-
-        self.installButton.setStyleSheet(
-            f'QPushButton {{ border: none; background: {loaded_theme.get("blue")}; color: {loaded_theme.get("base")}; border-radius: 5px; font: 15pt "{global_font}"}}'
-            f'QPushButton:hover {{ background: {loaded_theme.get("lavender")};}}'
-            f'QPushButton:pressed {{ background: {loaded_theme.get("installbuttonpressed")};}}'
-        )
-        self.locationSelector.setStyleSheet(
-            f'QPushButton {{ border: none;background: {loaded_theme.get("button")}; border-radius: 5px; font-family: "{global_font}" }}'
-            f'QPushButton:hover {{ background: {loaded_theme.get("buttonhovered")}; }}'
-            f'QPushButton:pressed {{ background: {loaded_theme.get("buttonpressed")}; }}'
-        )
-        self.infoButton.setStyleSheet(
-            f'QPushButton{{ color: #00000000; font-family: "{global_font}"}}'
-            f'QPushButton:hover {{ color: {loaded_theme.get("label")}; text-align: left; padding-left: 30px}}'
-        )
-        self.issuesButton.setStyleSheet(
-            f'QPushButton{{ color: #00000000; font-family: "{global_font}"}}'
-            f'QPushButton:hover {{ color: {loaded_theme.get("label")}; text-align: left; padding-left: 30px}}'
-        )
-        self.themeToggle.setStyleSheet(
-            f'QPushButton{{ color: #00000000; font-family: "{global_font}"}}'
-            f'QPushButton:hover {{ color: {loaded_theme.get("label")}; text-align: right; padding-right: 30px}}'
-        )
-        self.settingsButton.setStyleSheet(
-            f'QPushButton{{ color: #00000000; font-family: "{global_font}"}}'
-            f'QPushButton:hover {{ color: {loaded_theme.get("label")}; text-align: right; padding-right: 30px}}'
-        )
-        self.versionHelp.setStyleSheet(
-            f'QPushButton{{ color: #00000000; font-family: "{global_font}"}}'
-            f'QPushButton:hover {{ color: {loaded_theme.get("label")}; text-align: right; padding-right: 30px}}'
-        )
-
-        self.versionLabel.setStyleSheet(
-            f'color: {loaded_theme.get("label")}; font: 12pt "{global_font}"'
-        )
-        self.versionSelector.setStyleSheet(f'font: 12pt "{global_font}"')
-        self.locationLabel.setStyleSheet(
-            f'color: {loaded_theme.get("label")}; font: 12pt "{global_font}"'
-        )
-        self.selectedLocation.setStyleSheet(
-            f'color: {loaded_theme.get("text")}; background-color: {loaded_theme.get("crust")}; font: 12pt "{global_font}"'
-        )
-        self.themeToggleIcon.load(
-            Ui_MainWindow.getAsset("moon.svg" if theme.is_dark() else "sun.svg")
-        )
-        # each effect can only apply to one widget
-        effect1 = QGraphicsColorizeEffect(self.centralwidget)
-        effect1.setColor(loaded_theme.get("icon"))
-        self.locationSelectorIcon.setGraphicsEffect(effect1)
-        effect2 = QGraphicsColorizeEffect(self.centralwidget)
-        effect2.setColor(loaded_theme.get("icon"))
-        self.infoButtonIcon.setGraphicsEffect(effect2)
-        effect3 = QGraphicsColorizeEffect(self.centralwidget)
-        effect3.setColor(loaded_theme.get("icon"))
-        self.issuesButtonIcon.setGraphicsEffect(effect3)
-        effect4 = QGraphicsColorizeEffect(self.centralwidget)
-        effect4.setColor(loaded_theme.get("icon"))
-        self.themeToggleIcon.setGraphicsEffect(effect4)
-        effect5 = QGraphicsColorizeEffect(self.centralwidget)
-        effect5.setColor(loaded_theme.get("icon"))
-        self.settingsButtonIcon.setGraphicsEffect(effect5)
-        effect6 = QGraphicsColorizeEffect(self.centralwidget)
-        effect6.setColor(loaded_theme.get("icon"))
-        self.versionHelpIcon.setGraphicsEffect(effect6)
-
-    def addVersions(self) -> None:
+        applyStyle()
+        self.themeToggleIcon.setProperty(
+            "asset", "moon.svg" if theme.is_dark() == "dark" else "sun.svg"
+        )
+        color = theme.load().get("icon")
+        for label in (
+            self.locationSelectorIcon,
+            self.infoButtonIcon,
+            self.issuesButtonIcon,
+            self.themeToggleIcon,
+            self.settingsButtonIcon,
+            self.versionHelpIcon,
+        ):
+            icon = tintedIcon(label.property("asset"), color, label.width())
+            label.setPixmap(icon.pixmap(label.size()))
+
+    @Slot(object)
+    def setVersions(self, supported: dict) -> None:
         """
-        Adds the versions to the version selector.
+        Shows the versions in the version selector, keeping the selected one if it's still supported.
+        Runs in the UI thread.
+
+        Args:
+            supported (dict): The versions, see `versions.resolve`.
         """
-        for version in main.get_pack_mc_versions().keys():
-            self.versionSelector.addItem(version)
-        self.versionSelector.setCurrentIndex(0)
+        names = list(supported)
+        shown = [
+            self.versionSelector.itemText(i)
+            for i in range(self.versionSelector.count())
+        ]
+        if names == shown:
+            return
+        selected = self.versionSelector.currentText()
+        self.versionSelector.clear()
+        self.versionSelector.addItems(names)
+        self.versionSelector.setCurrentIndex(
+            max(self.versionSelector.findText(selected), 0)
+        )
 
     def getAsset(asset: str) -> str:
         """
@@ -404,39 +463,237 @@ class Ui_MainWindow(object):
         dialog = SettingsDialog(self)
         dialog.exec()
 
-    def startInstall(self) -> None:
+    def updateInstallButton(self) -> None:
         """
-        Start the installation process.
+        Shows whether the install button starts or cancels an install to the selected location.
         """
-        loaded_theme = theme.load()
-        # make sure the installation process is only running once
-        if self.installing is True:
-            return
-        self.installButton.setDisabled(True)
-        self.installButton.setStyleSheet(
-            f'QPushButton {{ border: none; background: {loaded_theme.get("installbuttonpressed")}; color: {loaded_theme.get("base")}; border-radius: 5px; font: 15pt "{global_font}"}}'
-            f'QPushButton:hover {{ background: {loaded_theme.get("installbuttonpressed")};}}'
-            f'QPushButton:pressed {{ background: {loaded_theme.get("installbuttonpressed")};}}'
+        job = self.installQueue.find(self.selectedLocation.toPlainText())
+        key = "install_button" if job is None else "cancel_button"
+        # a cancelled install still has to stop before the location can be installed to again
+        self.installButton.setDisabled(job is not None and job.cancelled)
+        self.installButton.setText(
+            QCoreApplication.translate(
+                "MainWindow", self.i18n_strings[f"vanilla_installer.gui.{key}"], None
+            )
         )
-        version = self.versionSelector.itemText(self.versionSelector.currentIndex())
+        if self.installButton.property("busy") != (job is not None):
+            self.installButton.setProperty("busy", job is not None)
+            # the stylesheet selects on the property, but Qt doesn't notice it changed
+            self.installButton.style().unpolish(self.installButton)
+            self.installButton.style().polish(self.installButton)
+
+    def startInstall(self) -> None:
+        """
+        Queue an install to the selected location, or cancel the one that's already queued or running.
+        """
         location = self.selectedLocation.toPlainText()
-        self.installing = True
-        if version.startswith("1.16"):
-            java_ver = 8
-        elif version.startswith("1.17"):
-            java_ver = 16
+        job = self.installQueue.find(location)
+        if job is not None:
+            job.cancel()
+            self.subtitle.setText(f"Cancelling the install of {job.version}...")
         else:
-            java_ver = 17.3
-        main.run(location, version, java_ver, "GUI", self.subtitle)
-        self.installing = False
-        self.installButton.setDisabled(False)
-        self.installButton.setStyleSheet(
-            f'QPushButton {{ border: none; background: {loaded_theme.get("blue")}; color: {loaded_theme.get("base")}; border-radius: 5px; font: 15pt "{global_font}"}}'
-            f'QPushButton:hover {{ background: {loaded_theme.get("lavender")};}}'
-            f'QPushButton:pressed {{ background: {loaded_theme.get("installbuttonpressed")};}}'
+            version = self.versionSelector.itemText(self.versionSelector.currentIndex())
+            self.resetTimer.stop()
+            job = self.installQueue.submit(
+                location, version, main.java_for_version(version)
+            )
+            if not job.started:
+                self.subtitle.setText(f"Queued the install of {version}.")
+        self.updateInstallButton()
+
+    @Slot(object, object)
+    def showEvent(self, job: "InstallJob", event: events.Event) -> None:
+        """
+        Shows an event of an install in the subtitle. Runs in the UI thread.
+
+        Args:
+            job (InstallJob): The install.
+            event (events.Event): The event.
+        """
+        if job.cancelled:
+            return
+        # say which install it's about if there are several
+        prefix = f"{job.version}: " if len(self.installQueue.jobs) > 1 else ""
+        if isinstance(event, events.StageStarted):
+            self.subtitle.setText(prefix + event.description)
+        elif isinstance(event, events.Message):
+            if event.level == "error":
+                job.error = event.text
+            self.subtitle.setText(prefix + event.text)
+        elif isinstance(event, events.Error):
+            # keep the more specific message the failing step may have sent before
+            if job.error is None:
+                job.error = event.error
+            self.subtitle.setText(prefix + job.error)
+        elif isinstance(event, events.Progress) and event.total:
+            self.subtitle.setText(
+                f"{prefix}{events.format_bytes(event.done)} / {events.format_bytes(event.total)}"
+                f" ({min(event.done / event.total, 1):.0%})"
+            )
+
+    @Slot(object, str)
+    def jobFinished(self, job: "InstallJob", result: str) -> None:
+        """
+        Updates the UI after an install finished. Runs in the UI thread.
+
+        Args:
+            job (InstallJob): The install.
+            result (str): "done", "failed" or "cancelled".
+        """
+        if result == "cancelled":
+            self.subtitle.setText(f"Cancelled the install of {job.version}.")
+        elif result == "failed":
+            self.subtitle.setText(
+                f"{job.version}: {job.error}"
+                if job.error
+                else f"Could not install {job.version}."
+            )
+        self.updateInstallButton()
+        if result == "failed":
+            # the error stays until the next install, it must not vanish before it's read
+            self.resetTimer.stop()
+        elif not self.installQueue.jobs:
+            self.resetTimer.start()
+
+    def resetSubtitle(self) -> None:
+        """Shows the subtitle instead of the result of the last install."""
+        self.subtitle.setText(
+            QCoreApplication.translate(
+                "MainWindow", self.i18n_strings["vanilla_installer.gui.subtitle"], None
+            )
         )
-        sleep(3.5)
-        main.text_update("Vanilla Installer", self.subtitle)
+
+
+class VersionLoader(QObject):
+    """
+    Refreshes the version list in a worker thread and hands it to the UI thread.
+    """
+
+    loaded = Signal(object)  # the versions, see `versions.resolve`
+
+    def refresh(self) -> None:
+        """Downloads the version list if the known one is stale, see `versions.refresh`."""
+        self.loaded.emit(versions.refresh())
+
+
+class InstallJob(QRunnable):
+    """
+    An install queued in an InstallQueue. It can be cancelled before or while it runs.
+    """
+
+    def __init__(
+        self, queue: "InstallQueue", location: str, version: str, java_ver: float
+    ) -> None:
+        super(InstallJob, self).__init__()
+        # the queue keeps a reference until the job is finished
+        self.setAutoDelete(False)
+        self.queue = queue
+        self.location = location
+        self.version = version
+        self.java_ver = java_ver
+        self.started = False
+        self.error = None  # the last error reported, see Ui_MainWindow.showEvent
+        self.bus = events.Bus()
+        events.log_sink(self.bus)
+        # the UI doesn't need more than 10 progress updates a second
+        self.bus.subscribe(lambda event: queue.jobEvent.emit(self, event), 0.1)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the install was cancelled."""
+        return self.bus.cancelled
+
+    def cancel(self) -> None:
+        """Cancels the install. A running install stops at its next download chunk."""
+        self.bus.cancel()
+
+    @Slot()
+    def run(self) -> None:
+        self.started = True
+        try:
+            self.bus.check()
+            success = main.run(
+                self.location, self.version, self.java_ver, "GUI", bus=self.bus
+            )
+            result = "done" if success else "failed"
+        except events.Cancelled:
+            logger.info(f"Cancelled the install of {self.version} to {self.location}.")
+            result = "cancelled"
+        except Exception as e:
+            logger.exception(f"Could not install to {self.location}: {e}")
+            self.error = str(e) or type(e).__name__
+            result = "failed"
+        self.queue.jobFinished.emit(self, result)
+
+
+class InstallQueue(QObject):
+    """
+    Runs installs on a thread pool of its own, at most MAX_JOBS at once, the rest wait in line.
+    Downloads of all jobs share one HTTP session, which caps the connections per host (see
+    `network.get_pool_maxsize`), so running jobs at the same time doesn't multiply the network load.
+
+    The signals are emitted from the pool's threads and delivered in the thread the queue lives in.
+    """
+
+    MAX_JOBS = 2
+
+    jobEvent = Signal(object, object)  # the job, an events.Event
+    jobFinished = Signal(object, str)  # the job, "done", "failed" or "cancelled"
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.MAX_JOBS)
+        self.jobs = []  # queued and running, oldest first
+        # connected first, so the job is gone by the time other slots run
+        self.jobFinished.connect(self._forget)
+
+    def find(self, location: str) -> Optional[InstallJob]:
+        """
+        Finds the queued or running install to a location.
+
+        Args:
+            location (str): The .minecraft folder.
+
+        Returns:
+            InstallJob | None: The job, or None if there is none.
+        """
+        for job in self.jobs:
+            if pathlib.Path(job.location) == pathlib.Path(location):
+                return job
+        return None
+
+    def submit(self, location: str, version: str, java_ver: float) -> InstallJob:
+        """
+        Queues an install.
+
+        Args:
+            location (str): The .minecraft folder to install to.
+            version (str): The Minecraft version.
+            java_ver (float): The Java version, see `main.java_for_version`.
+
+        Raises:
+            ValueError: If there already is an install to that location.
+
+        Returns:
+            InstallJob: The job.
+        """
+        # two jobs writing the same files would break both
+        if self.find(location) is not None:
+            raise ValueError(f"{location} is already being installed to.")
+        job = InstallJob(self, location, version, java_ver)
+        self.jobs.append(job)
+        self.pool.start(job)
+        return job
+
+    def cancelAll(self) -> None:
+        """Cancels every queued and running install."""
+        for job in self.jobs:
+            job.cancel()
+
+    @Slot(object, str)
+    def _forget(self, job: InstallJob, result: str) -> None:
+        self.jobs.remove(job)
 
 
 class SettingsDialog(QDialog):
@@ -472,6 +729,7 @@ class SettingsDialog(QDialog):
             button.setIcon(QIcon())  # remove the button icons
 
         self.fontDyslexicCheckbox = QCheckBox(self)
+        self.fontDyslexicCheckbox.setObjectName("fontDyslexicCheckbox")
         self.fontDyslexicCheckbox.setCheckState(
             Qt.CheckState.Checked
             if global_font == "OpenDyslexic"
@@ -481,9 +739,9 @@ class SettingsDialog(QDialog):
         self.fontDyslexicCheckbox.setGeometry(QRect(10, 10, 380, 20))
 
         self.errorLabel = QLabel(self)
+        self.errorLabel.setObjectName("errorLabel")
         self.errorLabel.setWordWrap(True)
         self.errorLabel.setGeometry(QRect(20, 200, 200, 20))
-        self.reloadTheme()
         self.retranslateUi(self)
         self.buttonBox.accepted.connect(self.accept)
         self.buttonBox.rejected.connect(self.reject)
@@ -508,27 +766,6 @@ class SettingsDialog(QDialog):
             QCoreApplication.translate("Dialog", "Enable dyslexia friendly font", None)
         )
 
-    def reloadTheme(self) -> None:
-        """
-        Reload the theme.
-        """
-        loaded_theme = theme.load()
-        self.setStyleSheet(
-            f'[objectName^="Dialog"] {{ background-color: {loaded_theme.get("base")}}}'
-        )
-        self.buttonBox.setStyleSheet(
-            f'QPushButton {{ border: none; background-color: { loaded_theme.get("button") } ; color: {loaded_theme.get("text")}; padding: 8px; border-radius: 5px; font-family: "{global_font}"}}'
-            f'QPushButton:hover {{ background-color: { loaded_theme.get("buttonhovered") }}}'
-            f'QPushButton:hover {{ background-color: { loaded_theme.get("buttonpressed") }}}'
-        )
-        self.fontDyslexicCheckbox.setStyleSheet(
-            f'color: {loaded_theme.get("label")}; font-family: "{global_font}"'
-        )
-
-        self.errorLabel.setStyleSheet(
-            f'color: {loaded_theme.get("red")}; font: 8pt "{global_font}"'
-        )
-
     def changeFont(self, state) -> None:
         """
         Toggle font between OpenDyslexic and Inter.
@@ -537,8 +774,8 @@ class SettingsDialog(QDialog):
             state: int, 2 implies a checked state and 0 would mean unchecked
         """
         setFont(state == 2)
-        self.reloadTheme()
-        self.parentWindow.reloadTheme()
+        # the stylesheet of the application covers this dialog too
+        applyStyle()
 
 
 class Worker(QRunnable):
@@ -0,0 +1,181 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Hashes in the formats packs pin their files with, computed while the files are downloaded.
+
+`new` returns a hashlib hasher that `network.stream_to` feeds the chunks of a download to.
+murmur2 mixes the length of the data into its initial state, so it can't be computed that
+way: it's computed from the finished file instead (`hash_file`), in two passes so the file
+is never in memory at once. Digests are in the notation packwiz uses: hex, or decimal for murmur2.
+"""
+import hashlib
+import struct
+from pathlib import Path
+
+from vanilla_installer import network
+
+FORMATS = ("sha1", "sha256", "sha512", "md5", "murmur2")
+# the formats `new` can compute chunk by chunk
+STREAMING_FORMATS = ("sha1", "sha256", "sha512", "md5")
+
+_WHITESPACE = b"\t\n\r "  # ignored by murmur2
+_M = 0x5BD1E995
+
+
+class HashMismatchError(ValueError):
+    """Raised when a file doesn't match the hash it was expected to have."""
+
+
+def _mix(h: int, data: bytes) -> int:
+    # the body of murmur2, len(data) must be a multiple of 4
+    for (k,) in struct.iter_unpack("<I", data):
+        k = (k * _M) & 0xFFFFFFFF
+        k ^= k >> 24
+        k = (k * _M) & 0xFFFFFFFF
+        h = ((h * _M) & 0xFFFFFFFF) ^ k
+    return h
+
+
+def _finish(h: int, tail: bytes) -> int:
+    if tail:
+        h ^= int.from_bytes(tail, "little")
+        h = (h * _M) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * _M) & 0xFFFFFFFF
+    h ^= h >> 15
+    return h
+
+
+def murmur2(data: bytes) -> int:
+    """
+    Computes the MurmurHash2 variant CurseForge uses as a file fingerprint.
+    Whitespace (tab, newline, carriage return and space) is ignored, and the seed is 1.
+
+    Args:
+        data (bytes): The data to hash.
+
+    Returns:
+        int: The 32-bit hash.
+    """
+    data = data.translate(None, _WHITESPACE)
+    tail = len(data) - len(data) % 4
+    h = _mix((1 ^ len(data)) & 0xFFFFFFFF, memoryview(data)[:tail])
+    return _finish(h, data[tail:])
+
+
+def murmur2_file(path: Path) -> int:
+    """
+    Computes the murmur2 of a file, see `murmur2`, without reading it into memory at once.
+    The length without whitespace goes into the initial state, so the file is read twice:
+    once to count, once to hash.
+
+    Args:
+        path (Path): The file to hash.
+
+    Returns:
+        int: The 32-bit hash.
+    """
+    length = 0
+    with open(path, "rb") as file:
+        while chunk := file.read(network.CHUNK_SIZE):
+            length += len(chunk.translate(None, _WHITESPACE))
+    h = (1 ^ length) & 0xFFFFFFFF
+    rest = b""  # what didn't fill a 4-byte word yet
+    with open(path, "rb") as file:
+        while chunk := file.read(network.CHUNK_SIZE):
+            data = rest + chunk.translate(None, _WHITESPACE)
+            tail = len(data) - len(data) % 4
+            h = _mix(h, memoryview(data)[:tail])
+            rest = data[tail:]
+    return _finish(h, rest)
+
+
+def new(hash_format: str):
+    """
+    Creates a hasher to feed the chunks of a download to.
+    murmur2 can't be computed that way, see `hash_file`.
+
+    Args:
+        hash_format (str): sha1, sha256, sha512 or md5, see STREAMING_FORMATS.
+
+    Raises:
+        ValueError: If the format is unknown or can't be streamed.
+
+    Returns:
+        The hashlib hasher.
+    """
+    hash_format = hash_format.lower()
+    if hash_format not in STREAMING_FORMATS:
+        raise ValueError(f"Can't compute {hash_format} while downloading.")
+    return hashlib.new(hash_format)
+
+
+def hash_bytes(data: bytes, hash_format: str) -> str:
+    """
+    Hashes `data`.
+
+    Args:
+        data (bytes): The data to hash.
+        hash_format (str): sha1, sha256, sha512, md5 or murmur2.
+
+    Raises:
+        ValueError: If the format is unknown.
+
+    Returns:
+        str: The hash.
+    """
+    if hash_format.lower() == "murmur2":
+        # murmur2 is the one format packwiz writes in decimal
+        return str(murmur2(data))
+    hasher = new(hash_format)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def hash_file(path: Path, formats: tuple) -> dict:
+    """
+    Hashes a file in several formats, reading it in fixed-size chunks.
+    The formats of STREAMING_FORMATS share one pass, murmur2 needs two of its own.
+
+    Args:
+        path (Path): The file to hash.
+        formats (tuple): The formats, see FORMATS.
+
+    Raises:
+        ValueError: If a format is unknown.
+
+    Returns:
+        dict: The hashes, mapped to by their format.
+    """
+    formats = [hash_format.lower() for hash_format in formats]
+    hashers = {
+        hash_format: new(hash_format)
+        for hash_format in formats
+        if hash_format != "murmur2"
+    }
+    hashes = {}
+    if hashers:
+        with open(path, "rb") as file:
+            while chunk := file.read(network.CHUNK_SIZE):
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+        hashes = {
+            hash_format: hasher.hexdigest() for hash_format, hasher in hashers.items()
+        }
+    if "murmur2" in formats:
+        hashes["murmur2"] = str(murmur2_file(path))
+    return hashes
+
+
+def matches(actual: str, expected: str) -> bool:
+    """
+    Compares two hashes of the same format.
+
+    Args:
+        actual (str): The hash of the data.
+        expected (str): The hash it should have.
+
+    Returns:
+        bool: Whether they're the same hash.
+    """
+    return actual.lower() == str(expected).lower()
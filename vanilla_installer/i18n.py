@@ -1,30 +1,179 @@
-"""Provides internationalization (i18n) services to the Vanilla Installer."""
+"""
+Provides internationalization (i18n) services to the Vanilla Installer.
+
+The strings of each language are JSON files in `assets/lang`, located through the package
+resources so it doesn't matter where the installer is started from. They're also compiled
+into the `_catalogs` module, so starting the GUI doesn't parse any JSON; run
+`python -m vanilla_installer.i18n` after changing a language file (CI checks it with `--check`).
+
+Every language falls back to more general ones, e.g. de_at to de_de to en_us. The fallbacks
+are merged when a language is loaded, which happens once per process, so a lookup is a single
+dict access.
+"""
+import functools
 import json
-from pathlib import Path
+import sys
+from importlib import resources
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 from vanilla_installer import log
 
 logger = log.setup_logging()
 
-if Path("vanilla_installer").exists():
-    # This is a development environment, being run from the root directory
-    lang_file_placeholder = "vanilla_installer/assets/lang/{}.json"
-else:
-    lang_file_placeholder = "assets/lang/{}.json"
+DEFAULT = "en_us"
+COMPILED_PATH = "_catalogs.py"  # relative to the package
+
+_HEADER = '''"""
+The language files in assets/lang, compiled into Python so they don't need to be parsed.
+Generated by `python -m vanilla_installer.i18n`, don't edit it by hand.
+"""
+'''
+
+
+def _lang_dir():
+    return resources.files("vanilla_installer") / "assets" / "lang"
+
+
+def fallbacks(language_code: str) -> list:
+    """
+    Gets the languages to look strings up in, most specific first.
+
+    Args:
+        language_code (str): The language code, e.g. "de_at".
+
+    Returns:
+        list: e.g. ["de_at", "de_de", "en_us"].
+    """
+    chain = [language_code.lower()]
+    language = chain[0].split("_")[0]
+    chain.append(f"{language}_{language}")
+    chain.append(DEFAULT)
+    return list(dict.fromkeys(chain))
+
+
+def _read_source(language_code: str) -> Optional[dict]:
+    try:
+        return json.loads(_lang_dir().joinpath(f"{language_code}.json").read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def _read(language_code: str) -> Optional[dict]:
+    # the compiled catalogs are missing if they weren't generated yet, e.g. in a fresh checkout
+    try:
+        from vanilla_installer._catalogs import CATALOGS
+    except ImportError:
+        CATALOGS = {}
+    if language_code in CATALOGS:
+        return CATALOGS[language_code]
+    return _read_source(language_code)
+
+
+@functools.cache
+def catalog(language_code: str = DEFAULT) -> Mapping:
+    """
+    Loads the strings of a language, merged with its fallbacks. Each language is only loaded once.
+
+    Args:
+        language_code (str, optional): The language code. Defaults to en_us.
+
+    Returns:
+        Mapping: The strings, mapped to by their key. Read-only.
+    """
+    merged = {}
+    found = []
+    # the most general language first, so the specific ones override it
+    for code in reversed(fallbacks(language_code)):
+        strings = _read(code)
+        if strings is not None:
+            merged.update(strings)
+            found.append(code)
+    if language_code.lower() not in found:
+        logger.warning(
+            f"No strings for {language_code}, falling back to {found[-1] if found else 'nothing'}."
+        )
+    return MappingProxyType(merged)
 
 
-def get_i18n_values(language_code: str = "en_us") -> dict:
+def get_i18n_values(language_code: str = DEFAULT) -> Mapping:
     """Get the strings in the language requested.
 
     Args:
         language (str, optional): The language code to get the strings for. Defaults to en_us, and falls back to en_us if the code given is invalid.
 
     Returns:
-        dict: The dictionary of strings for that language.
-    """
-    lang_file = Path(lang_file_placeholder.format(language_code)).resolve()
-    if lang_file.exists() is False:
-        logger.warning("Non-existant i18n code passed, falling back to en_us.")
-        lang_file = Path(lang_file_placeholder.format("en_us")).resolve()
-    lang_json = json.load(open(lang_file))
-    return lang_json
+        Mapping: The strings for that language, see `catalog`.
+    """
+    return catalog(language_code)
+
+
+def get(key: str, language_code: str = DEFAULT) -> str:
+    """
+    Gets a single string.
+
+    Args:
+        key (str): The key, e.g. "vanilla_installer.gui.install_button".
+        language_code (str, optional): The language code. Defaults to en_us.
+
+    Returns:
+        str: The string, or the key if no language has it.
+    """
+    return catalog(language_code).get(key, key)
+
+
+def compile_catalogs() -> str:
+    """
+    Compiles every language file into the source of the `_catalogs` module.
+
+    Returns:
+        str: The source.
+    """
+    catalogs = {
+        entry.name[: -len(".json")]: json.loads(entry.read_bytes())
+        for entry in sorted(_lang_dir().iterdir(), key=lambda entry: entry.name)
+        if entry.name.endswith(".json")
+    }
+    # JSON objects of strings are valid Python too
+    return (
+        f"{_HEADER}\nCATALOGS = {json.dumps(catalogs, indent=4, ensure_ascii=False)}\n"
+    )
+
+
+def main(argv: list) -> int:
+    """
+    Writes the `_catalogs` module, or with `--check`, checks that it's up to date.
+
+    Args:
+        argv (list): The arguments.
+
+    Returns:
+        int: The exit code.
+    """
+    path = resources.files("vanilla_installer").joinpath(COMPILED_PATH)
+    source = compile_catalogs()
+    if "--check" in argv:
+        # compare what it contains, it may have been reformatted
+        compiled = {}
+        try:
+            exec(path.read_text(encoding="utf-8"), compiled)
+        except FileNotFoundError:
+            pass
+        expected = {}
+        exec(source, expected)
+        if compiled.get("CATALOGS") != expected["CATALOGS"]:
+            print(
+                f"{COMPILED_PATH} is out of date, run `python -m vanilla_installer.i18n`.",
+                file=sys.stderr,
+            )
+            return 1
+        print(f"{COMPILED_PATH} is up to date.")
+        return 0
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(source)
+    print(f"Wrote {path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
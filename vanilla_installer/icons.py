@@ -0,0 +1,122 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Icons for launcher profiles, as the data URIs the launcher stores in launcher_profiles.json.
+
+The default icon is shipped with the installer. Custom icons are resized (if PySide6 is
+installed) and encoded once, then cached by the hash of their content, so creating a
+profile never needs the network and rarely needs to decode an image.
+"""
+import base64
+import functools
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+from vanilla_installer import cache, log
+
+logger = log.setup_logging()
+
+DEFAULT_ICON = Path(__file__).parent / "assets" / "icon.png"
+SIZE = 128  # the launcher shows icons at up to 128x128
+
+_MIME_TYPES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+
+def to_data_uri(data: bytes, mime_type: str = "image/png") -> str:
+    """
+    Encodes an image as a data URI.
+
+    Args:
+        data (bytes): The image.
+        mime_type (str, optional): The MIME type of the image. Defaults to "image/png".
+
+    Returns:
+        str: The data URI.
+    """
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def _mime_type(data: bytes) -> Optional[str]:
+    for magic, mime_type in _MIME_TYPES.items():
+        if data.startswith(magic):
+            return mime_type
+    return None
+
+
+def _resize(data: bytes, size: int) -> Optional[bytes]:
+    # Returns the image scaled to fit in size x size as a PNG, or None if that isn't possible.
+    try:
+        from PySide6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+        from PySide6.QtGui import QImage
+    except ImportError:
+        return None
+    image = QImage.fromData(data)
+    if image.isNull():
+        return None
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    output = QByteArray()
+    buffer = QBuffer(output)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(output)
+
+
+@functools.cache
+def default_icon() -> str:
+    """
+    Gets the icon shipped with the installer.
+
+    Returns:
+        str: The icon as a data URI.
+    """
+    return to_data_uri(DEFAULT_ICON.read_bytes())
+
+
+def profile_icon(path: Optional[str] = None, size: int = SIZE) -> str:
+    """
+    Gets the icon for a launcher profile.
+
+    Args:
+        path (str, optional): A PNG, JPEG or GIF to use. Defaults to the icon shipped with the installer.
+        size (int, optional): The size to shrink custom icons to, in pixels. Defaults to SIZE.
+
+    Raises:
+        ValueError: If the file isn't an image the launcher can show.
+
+    Returns:
+        str: The icon as a data URI.
+    """
+    if path is None:
+        return default_icon()
+    data = Path(path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    cached_path = cache.get_cache().path / "icons" / f"{digest}-{size}.txt"
+    try:
+        return cached_path.read_text(encoding="ascii")
+    except FileNotFoundError:
+        pass
+
+    resized = _resize(data, size)
+    if resized is not None:
+        data_uri = to_data_uri(resized)
+    else:
+        mime_type = _mime_type(data)
+        if mime_type is None:
+            raise ValueError(f"{path} is not a PNG, JPEG or GIF image.")
+        logger.info(f"Can't resize {path} without the GUI installed, using it as is.")
+        data_uri = to_data_uri(data, mime_type)
+
+    cached_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cached_path.with_suffix(".tmp")
+    temp_path.write_text(data_uri, encoding="ascii")
+    os.replace(temp_path, cached_path)
+    return data_uri
@@ -0,0 +1,288 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Finds the Java runtimes installed on this computer.
+
+Candidates are collected from JAVA_HOME, PATH, the runtimes the vanilla launcher downloads
+and the usual JDK install locations, and probed with `java -version` in parallel.
+The results are stored in the cache folder, keyed by path and modification time, so later
+runs only start a JVM for runtimes that were added or updated since.
+"""
+import json
+import os
+import platform
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from glob import glob
+from pathlib import Path
+from typing import Optional
+
+import minecraft_launcher_lib as mll
+
+from vanilla_installer import cache, log, trace
+
+logger = log.setup_logging()
+
+PROBE_TIMEOUT = 10  # seconds
+PROBE_WORKERS = 8
+EXECUTABLE = "java.exe" if platform.system() == "Windows" else "java"
+
+_runtimes = None
+_lock = threading.Lock()
+
+
+@dataclass
+class Runtime:
+    """A Java runtime found on this computer."""
+
+    path: str  # the java executable
+    version: str  # e.g. "17.0.3" or "1.8.0_51"
+    major: int  # e.g. 17 or 8
+
+    @property
+    def launcher_path(self) -> str:
+        """The executable to run programs with. On Windows, this is javaw.exe so no console window opens."""
+        javaw = Path(self.path).with_name("javaw.exe")
+        return str(javaw) if javaw.exists() else self.path
+
+
+def _index_path() -> Path:
+    return cache.get_cache().path / "java.json"
+
+
+def _launcher_runtime_dirs() -> list:
+    dirs = [Path(mll.utils.get_minecraft_directory()) / "runtime"]
+    system = platform.system()
+    if system == "Windows":
+        for variable in ("PROGRAMFILES(X86)", "PROGRAMFILES"):
+            if variable in os.environ:
+                dirs.append(
+                    Path(os.environ[variable]) / "Minecraft Launcher" / "runtime"
+                )
+        if "LOCALAPPDATA" in os.environ:
+            # the Microsoft Store version of the launcher
+            dirs.append(
+                Path(os.environ["LOCALAPPDATA"])
+                / "Packages"
+                / "Microsoft.4297127D64EC6_8wekyb3d8bbwe"
+                / "LocalCache"
+                / "Local"
+                / "runtime"
+            )
+    elif system == "Darwin":
+        dirs.append(Path("/Applications/Minecraft.app/Contents/MacOS/launcher/runtime"))
+    return dirs
+
+
+def _jdk_patterns() -> list:
+    system = platform.system()
+    home = Path.home()
+    patterns = [
+        str(home / ".jdks" / "*" / "bin" / EXECUTABLE),  # IntelliJ IDEA
+        str(home / ".sdkman" / "candidates" / "java" / "*" / "bin" / EXECUTABLE),
+    ]
+    if system == "Windows":
+        for variable in ("PROGRAMFILES", "PROGRAMFILES(X86)"):
+            if variable in os.environ:
+                patterns.append(
+                    str(Path(os.environ[variable]) / "*" / "*" / "bin" / EXECUTABLE)
+                )
+    elif system == "Darwin":
+        patterns.append(
+            f"/Library/Java/JavaVirtualMachines/*/Contents/Home/bin/{EXECUTABLE}"
+        )
+        patterns.append(
+            str(
+                home
+                / "Library/Java/JavaVirtualMachines/*/Contents/Home/bin"
+                / EXECUTABLE
+            )
+        )
+    else:
+        patterns.extend(
+            f"{root}/*/bin/{EXECUTABLE}"
+            for root in ("/usr/lib/jvm", "/usr/lib64/jvm", "/usr/java", "/opt")
+        )
+    return patterns
+
+
+def candidates() -> list:
+    """
+    Collects the paths that might be Java executables, without running any of them.
+
+    Returns:
+        list: Resolved paths to existing files, without duplicates.
+    """
+    paths = []
+    if "JAVA_HOME" in os.environ:
+        paths.append(Path(os.environ["JAVA_HOME"]) / "bin" / EXECUTABLE)
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if directory:
+            paths.append(Path(directory) / EXECUTABLE)
+    for runtime_dir in _launcher_runtime_dirs():
+        # e.g. java-runtime-gamma/linux/java-runtime-gamma/bin/java
+        paths.extend(Path(p) for p in glob(str(runtime_dir / "*/*/*/bin" / EXECUTABLE)))
+        # on macOS, the runtime is a bundle
+        paths.extend(
+            Path(p)
+            for p in glob(
+                str(runtime_dir / "*/*/*/jre.bundle/Contents/Home/bin" / EXECUTABLE)
+            )
+        )
+    for pattern in _jdk_patterns():
+        paths.extend(Path(p) for p in glob(pattern))
+
+    found = {}
+    for path in paths:
+        try:
+            if path.is_file():
+                # e.g. /usr/bin/java is a link to a runtime we also find on its own
+                found.setdefault(str(path.resolve()), None)
+        except OSError:
+            continue
+    return list(found)
+
+
+def parse_version(output: str) -> Optional[str]:
+    """
+    Gets the version from the output of `java -version`.
+
+    Args:
+        output (str): The output, e.g. `openjdk version "17.0.3" 2022-04-19`.
+
+    Returns:
+        str | None: The version, e.g. "17.0.3", or None if there is none.
+    """
+    match = re.search(r'version "([^"]+)"', output)
+    return match.group(1) if match else None
+
+
+def major_version(version: str) -> int:
+    """
+    Gets the major version of a Java version.
+
+    Args:
+        version (str): The version, e.g. "17.0.3", "1.8.0_51" or "21".
+
+    Returns:
+        int: The major version, e.g. 17 or 8.
+    """
+    parts = re.findall(r"\d+", version)
+    if parts[0] == "1" and len(parts) > 1:
+        # Java 8 and older are 1.x
+        return int(parts[1])
+    return int(parts[0])
+
+
+def probe(path: str) -> Optional[str]:
+    """
+    Runs `java -version` to find out which version a runtime is.
+
+    Args:
+        path (str): The path to the Java executable.
+
+    Returns:
+        str | None: The version, or None if it's not a working Java runtime.
+    """
+    try:
+        with trace.span("java -version", "subprocess", path=path):
+            result = subprocess.run(
+                [path, "-version"],
+                capture_output=True,
+                text=True,
+                timeout=PROBE_TIMEOUT,
+                # don't flash a console window for every probe on Windows
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Could not run {path}: {e}")
+        return None
+    # java -version writes to stderr
+    return parse_version(result.stderr) or parse_version(result.stdout)
+
+
+def _read_index() -> dict:
+    try:
+        return json.loads(_index_path().read_bytes())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_index(index: dict) -> None:
+    path = _index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def discover(refresh: bool = False) -> list:
+    """
+    Finds every Java runtime on this computer.
+    Only runtimes that are new or changed since the last time are probed.
+
+    Args:
+        refresh (bool, optional): Whether to look again even if this already ran in this process. Defaults to False.
+
+    Returns:
+        list: A Runtime for every working runtime, newest first.
+    """
+    global _runtimes
+    with _lock:
+        if _runtimes is not None and not refresh:
+            return _runtimes
+        index = _read_index()
+        new_index = {}
+        to_probe = []
+        for path in candidates():
+            mtime = os.stat(path).st_mtime_ns
+            known = index.get(path)
+            if known is not None and known["mtime"] == mtime:
+                new_index[path] = known
+            else:
+                new_index[path] = {"mtime": mtime, "version": None}
+                to_probe.append(path)
+        if to_probe:
+            logger.debug(f"Probing {len(to_probe)} Java runtimes.")
+            with ThreadPoolExecutor(PROBE_WORKERS, "java-probe") as executor:
+                for path, version in zip(to_probe, executor.map(probe, to_probe)):
+                    new_index[path]["version"] = version
+        if new_index != index:
+            _write_index(new_index)
+
+        runtimes = [
+            Runtime(path, entry["version"], major_version(entry["version"]))
+            for path, entry in new_index.items()
+            if entry["version"] is not None
+        ]
+        runtimes.sort(
+            key=lambda runtime: [
+                int(part) for part in re.findall(r"\d+", runtime.version)
+            ],
+            reverse=True,
+        )
+        for runtime in runtimes:
+            logger.debug(f"Found Java {runtime.version} at {runtime.path}.")
+        _runtimes = runtimes
+        return runtimes
+
+
+def find(major: int) -> Optional[Runtime]:
+    """
+    Finds the best runtime for a Java version.
+
+    Args:
+        major (int): The Java version that's needed, e.g. 8 or 17.
+
+    Returns:
+        Runtime | None: The newest runtime of exactly that version, or else the oldest newer one. None if there is neither.
+    """
+    runtimes = discover()
+    exact = [runtime for runtime in runtimes if runtime.major == major]
+    if exact:
+        return exact[0]
+    newer = [runtime for runtime in runtimes if runtime.major > major]
+    return newer[-1] if newer else None
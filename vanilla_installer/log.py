@@ -2,20 +2,40 @@
 # Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
 """
 Starts logging for Vanilla Installer.
+
+Logging is set up once per process, no matter how many modules call `setup_logging`.
+Records are handed to a queue and written to disk by a background thread, so logging
+never blocks on file I/O.
 """
 
+import atexit
 import logging
 import logging.handlers  # pylance moment
+import os
+import queue
 import sys
+import threading
 from pathlib import Path
+from typing import Optional, Union
+
+# set this environment variable to e.g. DEBUG to get more detailed logs
+LEVEL_ENV = "VANILLA_INSTALLER_LOG_LEVEL"
+DEFAULT_LEVEL = "INFO"
+
+_listener = None
+_lock = threading.Lock()
 
 
 class LoggerWriter:
-    def __init__(self, logfct):
+    def __init__(self, logfct, stream=None):
         self.logfct = logfct
+        # the original stream, so output still shows up in a terminal
+        self.stream = stream
         self.buf = []
 
     def write(self, msg):
+        if self.stream is not None:
+            self.stream.write(msg)
         if msg.endswith("\n"):
             self.buf.append(msg.removesuffix("\n"))
             self.logfct("".join(self.buf))
@@ -24,32 +44,76 @@ class LoggerWriter:
             self.buf.append(msg)
 
     def flush(self):
-        pass
+        if self.stream is not None:
+            self.stream.flush()
+
+
+class _FileHandler(logging.handlers.RotatingFileHandler):
+    def _open(self):
+        # the file is only opened once something is logged, so create the folder then too
+        Path(self.baseFilename).parent.mkdir(exist_ok=True)
+        return super()._open()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default implementation formats the record here so it can be pickled.
+        # The queue never leaves this process, so leave the formatting to the listener thread.
+        return record
+
 
+def set_level(level: Union[str, int]) -> None:
+    """
+    Sets the level of the Vanilla Installer logger.
+    Records below it are discarded before they are formatted.
 
-def setup_logging() -> logging.Logger:
+    Args:
+        level (str | int): The level, e.g. "DEBUG" or logging.DEBUG.
+    """
+    if isinstance(level, str):
+        level = level.upper()
+    logging.getLogger(__name__).setLevel(level)
+
+
+def setup_logging(level: Optional[Union[str, int]] = None) -> logging.Logger:
+    """
+    Sets up logging if that didn't happen yet, and returns the logger.
+
+    Args:
+        level (str | int, optional): The level to log at. Defaults to the VANILLA_INSTALLER_LOG_LEVEL environment variable, or INFO.
+
+    Returns:
+        logging.Logger: The logger.
+    """
+    global _listener
     logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
-    logfile_path = Path("./logs").resolve() / "vanilla_installer.log"
-    if logfile_path.exists() is False:
-        Path("./logs").resolve().mkdir(exist_ok=True)
-        with logfile_path as file:
-            open(file, "x", encoding="utf-8").write("")
-    handler = logging.handlers.RotatingFileHandler(
-        filename=logfile_path,
-        encoding="utf-8",
-        maxBytes=32 * 1024 * 1024,  # 32 MiB
-        backupCount=5,  # Rotate through 5 files
-    )
-
-    dt_fmt = "%Y-%m-%d %H:%M:%S"
-    formatter = logging.Formatter(
-        "[{asctime}] [{levelname:<8}] {name}: {message}", dt_fmt, style="{"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-
-    # To access the original stdout/stderr, use sys.__stdout__/sys.__stderr__
-    sys.stdout = LoggerWriter(logger.info)
-    sys.stderr = LoggerWriter(logger.error)
+    with _lock:
+        if _listener is None:
+            set_level(os.environ.get(LEVEL_ENV, DEFAULT_LEVEL))
+            logfile_path = Path("./logs").resolve() / "vanilla_installer.log"
+            handler = _FileHandler(
+                filename=logfile_path,
+                encoding="utf-8",
+                delay=True,
+                maxBytes=32 * 1024 * 1024,  # 32 MiB
+                backupCount=5,  # Rotate through 5 files
+            )
+
+            dt_fmt = "%Y-%m-%d %H:%M:%S"
+            formatter = logging.Formatter(
+                "[{asctime}] [{levelname:<8}] {name}: {message}", dt_fmt, style="{"
+            )
+            handler.setFormatter(formatter)
+
+            log_queue = queue.SimpleQueue()
+            logger.addHandler(_QueueHandler(log_queue))
+            _listener = logging.handlers.QueueListener(log_queue, handler)
+            _listener.start()
+            atexit.register(_listener.stop)
+
+            # To access the original stdout/stderr, use sys.__stdout__/sys.__stderr__
+            sys.stdout = LoggerWriter(logger.info, sys.stdout)
+            sys.stderr = LoggerWriter(logger.error, sys.stderr)
+    if level is not None:
+        set_level(level)
     return logger
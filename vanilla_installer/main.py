@@ -5,38 +5,60 @@ Most important functions of Vanilla Installer.
 """
 # IMPORTS
 
-import base64
-import io
-import json
+import asyncio
+import hashlib
 import logging
 import os
 import platform
+import shutil
 import subprocess
+import threading
 import zipfile
 from pathlib import Path
 from typing import Optional
 
 import click
 import minecraft_launcher_lib as mll
-import requests
 import tomlkit as toml
 
 # Local
-from vanilla_installer import __version__, config, log
+from vanilla_installer import (
+    __version__,
+    cache,
+    config,
+    events,
+    icons,
+    java,
+    log,
+    network,
+    packwiz,
+    profiles,
+    trace,
+    versions,
+)
 
 logger = log.setup_logging()
 logger.info("Starting Vanilla Installer")
 
 FOLDER_LOC = ""
 
+# everything the installer downloads apart from the pack itself, see also versions.VERSIONS_URL
+FABRIC_META_URL = "https://meta.fabricmc.net/v2/versions/loader/{}/{}/profile/zip"
+BOOTSTRAP_URL = "https://github.com/packwiz/packwiz-installer-bootstrap/releases/latest/download/packwiz-installer-bootstrap.jar"
 
-def set_dir(path: str = mll.utils.get_minecraft_directory()) -> str | None:
+# installs can run concurrently (see the batch module), this guards the shared versions folder
+_fabric_lock = threading.Lock()
+
+
+def set_dir(path: Optional[str] = None) -> str | None:
     """
     Sets the Minecraft game directory.
 
     Args:
-        path (str): The path to the Minecraft game directory.
+        path (str, optional): The path to the Minecraft game directory. Defaults to the default directory based on your OS.
     """
+    if path is None:
+        path = mll.utils.get_minecraft_directory()
     path_pl = Path(path).resolve()
     config.write("path", str(path_pl))
     return str(path_pl)
@@ -61,7 +83,7 @@ def newest_version() -> str:
     Returns:
       str: The latest Minecraft version that FO supports.
     """
-    return get_pack_mc_versions()[0]
+    return next(iter(get_pack_mc_versions()))
 
 
 def find_mc_java(java_ver: float = 17.3) -> str:
@@ -75,7 +97,7 @@ def find_mc_java(java_ver: float = 17.3) -> str:
         str: The complete path to the Java executable.
     """
 
-    program_files = os.environ["PROGRAMFILES(X86)"]
+    program_files = os.environ.get("PROGRAMFILES(X86)", "C:/Program Files (x86)")
 
     javas = {
         "Windows": {
@@ -90,7 +112,7 @@ def find_mc_java(java_ver: float = 17.3) -> str:
             "17.1": "~/.minecraft/runtime/java-runtime-beta/linux/java-runtime-beta/bin/java",
             "default": "~/.minecraft/runtime/java-runtime-gamma/linux/java-runtime-gamma/bin/java",
         },
-        "Mac": {
+        "Darwin": {
             "8": "/Applications/Minecraft.app/Contents/MacOS/launcher/runtime/java-runtime-legacy/darwin/java-runtime-legacy/bin/java",
             "16": "/Applications/Minecraft.app/Contents/MacOS/launcher/runtime/java-runtime-alpha/darwin/java-runtime-alpha/bin/java",
             "17.1": "/Applications/Minecraft.app/Contents/MacOS/launcher/runtime/java-runtime-beta/darwin/java-runtime-beta/bin/java",
@@ -100,14 +122,36 @@ def find_mc_java(java_ver: float = 17.3) -> str:
 
     default = javas[platform.system()]["default"]
 
-    return str(Path(javas[platform.system()].get(str(java_ver), default)).resolve())
+    return str(
+        Path(javas[platform.system()].get(str(java_ver), default))
+        .expanduser()
+        .resolve()
+    )
+
+
+def java_for_version(mc_version: str) -> float:
+    """
+    Gets the Java version to use for a Minecraft version.
+
+    Args:
+        mc_version (str): The Minecraft version.
+
+    Returns:
+        float: The Java version, as accepted by `get_java`.
+    """
+    if mc_version.startswith("1.16"):
+        return 8
+    elif mc_version.startswith("1.17"):
+        return 16
+    return 17.3
 
 
 def get_java(java_ver: float = 17.3) -> str:
     """
     Gets the path to a Java executable.
-    If the user doesn't have a JRE/JDK installed on the system, it will default to the Microsoft
-    OpenJDK / Microsoft JDK build that the vanilla launcher installs when you run Minecraft.
+    The runtimes on this computer are searched for the right version first, see the java module.
+    If none fits, it will default to the Microsoft OpenJDK / Microsoft JDK build that the vanilla
+    launcher installs when you run Minecraft.
 
     Args:
         java_ver (float, optional): The Java version to find. Can be 8, 16, 17.1 (Java 17.0.1) or 17.3 (Java 17.0.3). Defaults to 17.3, and falls back to 17.3 if the integer is invalid.
@@ -115,37 +159,32 @@ def get_java(java_ver: float = 17.3) -> str:
     Returns:
         str: The complete path to the Java executable.
     """
-    java = mll.utils.get_java_executable()
-    if java is None or java == "":
-        java = find_mc_java(java_ver)
-    return java
+    try:
+        major = int(float(java_ver))
+    except (TypeError, ValueError):
+        major = 17
+    runtime = java.find(major)
+    if runtime is not None:
+        logger.debug(f"Using Java {runtime.version} at {runtime.path}.")
+        return runtime.launcher_path
+    logger.warning(f"Could not find Java {major}, trying the launcher's runtime.")
+    return find_mc_java(java_ver)
 
 
 def fo_to_base64(png_dir: str = ".") -> str:
     """
     Converts the Fabulously Optimized logo from PNG format into base64.
-    The directory specified in `dir` will be searched. If that fails, FO logo will be downloaded over the network.
+    The directory specified in `dir` will be searched. If that fails, the icon shipped with the installer is used.
 
     Args:
         dir (str): The directory to search for the logo.
     Returns:
         str: The base64 string for the FO logo.
     """
-
-    dir_path = Path(png_dir)
-    png_content = bytes()
-
-    if (png_path := dir_path / "fo.png").exists():
-        png_content = png_path.read_bytes()
-    else:
-        logger.warning("Cannot find logo locally. Trying to download...")
-        url = "https://avatars.githubusercontent.com/u/92206402"
-        if (response := requests.get(url)).status_code == 200:
-            png_content = response.content
-        else:
-            logger.critical("Could not get the FO logo over the network.")
-    b64logo = base64.b64encode(png_content).decode("utf-8")
-    return f"data:image/png;base64,{b64logo}"
+    png_path = Path(png_dir) / "fo.png"
+    if png_path.exists():
+        return icons.profile_icon(str(png_path))
+    return icons.default_icon()
 
 
 def get_version() -> str:
@@ -157,6 +196,7 @@ def text_update(
 ) -> None:
     """
     Updates the text shown on the GUI window or echoes using Click.
+    During `run`, the text is sent to the install's event bus instead, see the events module.
 
     Args:
         text (str): The text to display
@@ -164,7 +204,10 @@ def text_update(
         mode (str, optional): The type of message to log. Defaults to "info".
         interface (str, optional): The interface to display to. Defaults to "GUI", possible values are "GUI" and "CLI".
     """
-    if interface != "CLI":
+    bus = events.current()
+    if bus is not None:
+        bus.message(text, mode)
+    elif interface != "CLI":
         if widget:
             widget.setText(text)
 
@@ -186,14 +229,37 @@ def text_update(
             click.echo(text)
 
 
-def command(text: str) -> str:
+def command(text: str, cwd: Optional[str] = None) -> str:
     """
     Runs a command with subprocess.
+    During `run`, the command is killed if the install is cancelled.
+
+    Args:
+        text (str): The command.
+        cwd (str, optional): The directory to run it in. Defaults to the current directory.
+
+    Raises:
+        subprocess.CalledProcessError: If the command failed.
+        events.Cancelled: If the install was cancelled.
 
     Returns:
         str: The output of the command.
     """
-    command_output = subprocess.check_output(text.split()).decode("utf-8")
+    bus = events.current()
+    with trace.span("command", "subprocess", command=text), subprocess.Popen(
+        text.split(), cwd=cwd, stdout=subprocess.PIPE
+    ) as process:
+        while True:
+            try:
+                stdout, _ = process.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if bus is not None and bus.cancelled:
+                    process.kill()
+                    raise events.Cancelled()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, text, stdout)
+    command_output = stdout.decode("utf-8")
     output = logger.debug(command_output)
     return output
 
@@ -209,74 +275,95 @@ def install_fabric(mc_version: str, mc_dir: str) -> str:
     Returns:
         str: The Fabric version id. Formatted as `fabric-loader-{fabric_version}-{game_version}`.
     """
-    meta_placeholder = "https://meta.fabricmc.net/v2/versions/loader/{}/{}/profile/zip"
     pack_toml_url = convert_version(mc_version)
 
-    # if (response := requests.get(pack_toml_url)).status_code == 200:
-    response = requests.get(pack_toml_url)
-    pack_info = toml.parse(response.text)
+    pack_info = toml.parse(cache.fetch(pack_toml_url).decode("utf-8"))
     game_version = pack_info["versions"]["minecraft"]
     fabric_version = pack_info["versions"]["fabric"]
-    meta_url = meta_placeholder.format(game_version, fabric_version)
+    meta_url = FABRIC_META_URL.format(game_version, fabric_version)
 
-    response = requests.get(meta_url)
     version_id = f"fabric-loader-{fabric_version}-{game_version}"
-    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
-        path = str(Path(mc_dir).resolve() / "versions")
-        archive.extractall(path)
+    versions_path = Path(mc_dir).resolve() / "versions"
+    with _fabric_lock:
+        if (versions_path / version_id / f"{version_id}.json").exists():
+            logger.info(f"{version_id} is already installed.")
+            return version_id
+        with zipfile.ZipFile(
+            cache.fetch_path(meta_url, events.current_progress())
+        ) as archive:
+            archive.extractall(str(versions_path))
 
     return version_id
 
 
-def download_pack(widget, interface: str = "GUI") -> str:
+def download_pack(widget, interface: str = "GUI", mc_dir: Optional[str] = None) -> str:
     """
     Downloads the packwiz_install_bootstrap jar.
 
     Args:
         interface (str, optional): The interface to pass to text_update, either "CLI" or "GUI". Defaults to "GUI".
+        mc_dir (str, optional): The directory to save it to. Defaults to the configured directory.
     Returns:
         str: The path to the packwiz_installer_bootstrap.jar.
     """
+    mc_dir = mc_dir or get_dir()
     text_update("Fetching Pack...", widget, "info", interface)
-    download_bootstrap = requests.get(
-        "https://github.com/packwiz/packwiz-installer-bootstrap/releases/latest/download/packwiz-installer-bootstrap.jar"
-    )
-    file_path_bootstrap = Path(get_dir()) / "packwiz-installer-bootstrap.jar"
-    with open(file_path_bootstrap, "wb") as file:
-        file.write(download_bootstrap.content)
-    packwiz_installer_bootstrap_path = (
-        Path(get_dir()) / "packwiz-installer-bootstrap.jar"
-    )
-    return str(packwiz_installer_bootstrap_path)
+    download_bootstrap = cache.fetch_path(BOOTSTRAP_URL, events.current_progress())
+    file_path_bootstrap = Path(mc_dir) / "packwiz-installer-bootstrap.jar"
+    # the Java engine downloads this before anything else is installed
+    file_path_bootstrap.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = file_path_bootstrap.with_suffix(".tmp")
+    shutil.copyfile(download_bootstrap, temp_path)
+    os.replace(temp_path, file_path_bootstrap)
+    return str(file_path_bootstrap)
 
 
 def install_pack(
-    packwiz_installer_bootstrap: str,
+    packwiz_installer_bootstrap: Optional[str],
     mc_version: str,
     mc_dir: str,
     widget=None,
     interface: str = "GUI",
     java_ver: float = 17.3,
-) -> None:
+    engine: str = "native",
+) -> bool:
     """
     Installs Fabulously Optimized.
 
     Args:
-        packwiz_installer_bootstrap (str): The path to the packwiz installer bootstrap.
+        packwiz_installer_bootstrap (str, optional): The path to the packwiz installer bootstrap. Only required for the Java engine, it is downloaded if None.
         mc_version (str): The version of Minecraft to install for.
         mc_dir (str): The directory to install to.
         widget (optional): The widget to update. Defaults to None.
         interface (str, optional): The interface to pass to text_update, either "CLI" or "GUI". Defaults to "GUI".
         java_ver (float): The Java version to use. Defaults to 17.3
+        engine (str, optional): The packwiz engine to use, either "native" or "java". Defaults to "native".
+
+    Returns:
+        bool: Whether the pack was installed.
     """
-    logger.debug("Installing the pack now.")
-    os.chdir(mc_dir)
-    os.makedirs(f"{get_dir()}/", exist_ok=True)
+    logger.debug(f"Installing the pack now with the {engine} engine.")
+    os.makedirs(mc_dir, exist_ok=True)
     pack_toml = convert_version(mc_version)
     try:
-        command(
-            f"{get_java(java_ver)} -jar {packwiz_installer_bootstrap} {pack_toml} --timeout 0"
-        )
+        if engine == "native":
+            try:
+                packwiz.install(pack_toml, mc_dir)
+            except packwiz.UnsupportedPackError as e:
+                logger.warning(f"{e} Falling back to the Java engine.")
+                engine = "java"
+        if engine == "java":
+            if network.get_mirror():
+                raise ValueError(
+                    "The Java engine can't install from a mirror, packwiz-installer would download the mods from the internet."
+                )
+            if packwiz_installer_bootstrap is None:
+                packwiz_installer_bootstrap = download_pack(widget, interface, mc_dir)
+            # packwiz-installer downloads the pack itself, so point it at the mirror directly
+            command(
+                f"{get_java(java_ver)} -jar {packwiz_installer_bootstrap} {network.mirrored(pack_toml)} --timeout 0",
+                cwd=mc_dir,
+            )
         logger.info(
             f"Completed installing Fabulously Optimized for Minecraft {mc_version}"
         )
@@ -286,6 +373,7 @@ def install_pack(
             "success",
             interface=interface,
         )
+        return True
     except Exception as e:
         logger.exception(f"Could not install Fabulously Optimized: {e}")
         text_update(
@@ -294,67 +382,70 @@ def install_pack(
             "error",
             interface,
         )
+        return False
 
 
-def create_profile(mc_dir: str, version_id: str) -> None:
+def create_profile(
+    mc_dir: str,
+    version_id: str,
+    icon: Optional[str] = None,
+    launcher_dir: Optional[str] = None,
+    batch: Optional[profiles.Batch] = None,
+) -> None:
     """
     Creates a profile in the vanilla launcher.
 
     Args:
         mc_dir (str): The path to the Minecraft directory.
         version_id (str): The version of Minecraft to create a profile for.
+        icon (str, optional): The icon as a data URI. Defaults to the icon shipped with the installer, see `icons.profile_icon`.
+        launcher_dir (str, optional): The directory of the launcher. Defaults to the default directory based on your OS.
+        batch (profiles.Batch, optional): A batch to add the profile to instead of writing it right away. Defaults to None.
     """
-    launcher_profiles_path = (
-        Path(mll.utils.get_minecraft_directory()) / "launcher_profiles.json"
-    )
-
-    try:
-        profiles = json.loads(launcher_profiles_path.read_bytes())
-    except Exception:
-        logger.error(f"Launcher profile not found at {launcher_profiles_path}.")
+    profile_id, name = profile_id_for(mc_dir, launcher_dir)
 
     profile = {
         "lastVersionId": version_id,
-        "name": "Fabulously Optimized",
+        "name": name,
         "type": "custom",
-        "icon": fo_to_base64(),
+        "icon": icon or icons.default_icon(),
         "gameDir": mc_dir,  # Not sure about this
         # "javaArgs": "I dunno if fabric installer sets any javaArgs by itself"
     }
 
-    profiles["profiles"]["FO"] = profile
-    profiles_json = json.dumps(profiles, indent=4)
-    launcher_profiles_path.write_text(profiles_json)
+    if batch is not None:
+        batch.add(profile_id, profile)
+    else:
+        profiles.upsert({profile_id: profile}, launcher_dir)
+
+
+def profile_id_for(mc_dir: str, launcher_dir: Optional[str] = None) -> tuple:
+    """
+    Gets the id and name of the launcher profile for a game directory.
+    The launcher's own directory keeps the "FO" profile, other directories get their own,
+    so installing to several directories doesn't overwrite one profile over and over.
+
+    Args:
+        mc_dir (str): The game directory.
+        launcher_dir (str, optional): The directory of the launcher. Defaults to the default directory based on your OS.
+
+    Returns:
+        tuple: The profile id and the profile name.
+    """
+    path = Path(mc_dir).resolve()
+    if path == Path(launcher_dir or mll.utils.get_minecraft_directory()).resolve():
+        return "FO", "Fabulously Optimized"
+    digest = hashlib.sha1(str(path).encode("utf-8")).hexdigest()[:8]
+    return f"FO-{digest}", f"Fabulously Optimized ({path.name})"
 
 
 def get_pack_mc_versions() -> dict:
     """
     Gets a list of all the versions FO currently supports.
+    The list is only fetched once per process, see `versions.resolve`.
     """
 
-    return_value = dict()
-    try:
-        try:
-            response = requests.get(
-                "https://raw.githubusercontent.com/Fabulously-Optimized/vanilla-installer/main/vanilla_installer/assets/versions.json"
-            ).json()
-        except requests.exceptions.RequestException or response.status_code != "200":
-            # This should never happen unless a) there's no internet connection, b) the file was deleted or is missing in a development case.
-            # In this case, fall back to a local file since in the latter you'll likely have the whole repo cloned.
-            # For this to work, you need to be in the root directory of the repository running this, otherwise the files will not be found.
-            logger.warning("GitHub failed, falling back to local...")
-            try:
-                local_path = (
-                    Path("vanilla_installer/assets").resolve() / "versions.json"
-                )
-            except:
-                local_path = Path("assets").resolve() / "versions.json"
-            response = json.loads(local_path.read_bytes())
-
-        return_value = dict(response)
-        return return_value
-    except requests.exceptions.RequestException as e:
-        logger.exception(f"Couldn't get minecraft versions: {e}")
+    return versions.resolve()
 
 
 def convert_version(input_mcver: str) -> str:
@@ -375,56 +466,189 @@ def convert_version(input_mcver: str) -> str:
         return return_value
 
 
-def run(
-    mc_dir: str = mll.utils.get_minecraft_directory(),
+async def run_async(
+    mc_dir: Optional[str] = None,
     version: Optional[str] = None,
     java_ver: float = 17.3,
     interface: str = "GUI",
     widget=None,
-) -> None:
+    engine: str = "native",
+    save_dir: bool = True,
+    icon: Optional[str] = None,
+    launcher_dir: Optional[str] = None,
+    profile_batch: Optional[profiles.Batch] = None,
+    bus: Optional[events.Bus] = None,
+) -> bool:
     """
     Runs Fabric's installer and then installs Fabulously Optimized.
+    Stages that don't depend on each other run concurrently: Fabric, the pack (after the
+    bootstrap download for the Java engine) and the profile icon. The profile is created
+    once all of them are done, and only if the pack was installed.
 
     Args:
         widget (optional): The widget to update. This is only used when interface is set to GUI. Defaults to None.
         mc_dir (str, optional): The directory to use. Defaults to the default directory based on your OS.
         version (str, optional): The version to install. Defaults to the newest version
         interface (str, optional): The interface to use, either CLI or GUI. Defaults to "GUI".
+        engine (str, optional): The packwiz engine to use, either "native" or "java". Defaults to "native".
+        save_dir (bool, optional): Whether to remember `mc_dir` in the config. Defaults to True.
+        icon (str, optional): The path to an image to use as the profile icon. Defaults to the icon shipped with the installer.
+        launcher_dir (str, optional): The directory of the launcher, where Fabric and the profile are installed. Defaults to the default directory based on your OS.
+        profile_batch (profiles.Batch, optional): A batch to add the profile to instead of writing it right away. Defaults to None.
+        bus (events.Bus, optional): The bus to report progress to. Defaults to one that logs, and shows progress on the CLI or in `widget`.
+
+    Raises:
+        events.Cancelled: If the install was cancelled with `bus.cancel()`.
+
+    Returns:
+        bool: Whether the pack was installed.
     """
-    logger.debug("Install function called, setting given directory.")
-    set_dir(mc_dir)
+    if mc_dir is None:
+        mc_dir = mll.utils.get_minecraft_directory()
+    if save_dir:
+        logger.debug("Install function called, setting given directory.")
+        set_dir(mc_dir)
 
     if not Path(mc_dir).resolve().exists():
         logger.warning("Given path did not exist; creating.")
-        Path(mc_dir).resolve().mkdir()
+        Path(mc_dir).resolve().mkdir(parents=True)
 
     if version is None:
         # the default version is set here instead of an argument because it slows down the startup
         # (by about ~0.05 seconds in my testing. but it might vary based on internet speeds)
         logger.warning("Version was not passed, defaulting to the latest version.")
-        version = newest_version()
-    logger.info("Calling install_fabric to install Fabric.")
-    text_update("Installing Fabric...", widget, "info", interface)
-    fabric_version = install_fabric(version, mll.utils.get_minecraft_directory())
-    logger.debug("Downloading FO - calling download_pack.")
-    text_update(
-        "Starting the Fabulously Optimized download...",
-        widget,
-        "info",
-        interface,
-    )
-    packwiz_bootstrap = download_pack(widget, interface)
-    logger.info("Installing FO, Packwiz will run.")
-    text_update("Installing Fabulously Optimized...", widget, "info", interface)
-    install_pack(
-        packwiz_bootstrap,
-        version,
-        mc_dir,
-        widget,
-        java_ver,
-    )
-    logger.info("Setting the profile.")
-    text_update("Setting profiles...", widget, "info", interface)
-    create_profile(mc_dir, fabric_version)
-    text_update("Complete!", widget, "info", interface)
+        version = await asyncio.to_thread(newest_version)
+
+    renderer = None
+    if bus is None:
+        bus = events.Bus()
+        events.log_sink(bus)
+        if interface == "CLI":
+            renderer = events.ProgressRenderer()
+            bus.subscribe(renderer, 0.1)
+        elif widget is not None:
+            bus.subscribe(_widget_sink(widget))
+
+    async def fabric_stage() -> str:
+        with bus.stage("fabric", "Installing Fabric..."):
+            return await asyncio.to_thread(
+                install_fabric,
+                version,
+                launcher_dir or mll.utils.get_minecraft_directory(),
+            )
+
+    async def pack_stage() -> bool:
+        packwiz_bootstrap = None
+        if engine == "java":
+            with bus.stage(
+                "bootstrap", "Starting the Fabulously Optimized download..."
+            ):
+                packwiz_bootstrap = await asyncio.to_thread(
+                    download_pack, widget, interface, mc_dir
+                )
+        with bus.stage("pack", "Installing Fabulously Optimized...") as stage:
+            installed = await asyncio.to_thread(
+                install_pack,
+                packwiz_bootstrap,
+                version,
+                mc_dir,
+                widget,
+                interface,
+                java_ver,
+                engine,
+            )
+            if not installed:
+                stage.fail("Could not install Fabulously Optimized.")
+            return installed
+
+    async def icon_stage() -> str:
+        with trace.span("icon", "stage", overlapping=True):
+            return await asyncio.to_thread(icons.profile_icon, icon)
+
+    with trace.span("install", "install", version=version, engine=engine):
+        try:
+            fabric_version, installed, icon_uri = await asyncio.gather(
+                fabric_stage(), pack_stage(), icon_stage()
+            )
+            if not installed:
+                # a profile for a broken instance would only fail when it's launched
+                logger.error("The pack wasn't installed, not creating a profile.")
+                return False
+            with bus.stage("profile", "Setting profiles..."):
+                await asyncio.to_thread(
+                    create_profile,
+                    mc_dir,
+                    fabric_version,
+                    icon_uri,
+                    launcher_dir,
+                    profile_batch,
+                )
+            bus.message("Complete!", "success")
+        finally:
+            if renderer is not None:
+                renderer.close()
     logger.info("Success!")
+    return installed
+
+
+def _widget_sink(widget):
+    # the old way of showing progress in the GUI, before it subscribed to the bus itself
+    def sink(event: events.Event) -> None:
+        if isinstance(event, events.StageStarted):
+            widget.setText(event.description)
+        elif isinstance(event, events.Message):
+            widget.setText(event.text)
+
+    return sink
+
+
+def run(
+    mc_dir: Optional[str] = None,
+    version: Optional[str] = None,
+    java_ver: float = 17.3,
+    interface: str = "GUI",
+    widget=None,
+    engine: str = "native",
+    save_dir: bool = True,
+    icon: Optional[str] = None,
+    launcher_dir: Optional[str] = None,
+    profile_batch: Optional[profiles.Batch] = None,
+    bus: Optional[events.Bus] = None,
+) -> bool:
+    """
+    Runs Fabric's installer and then installs Fabulously Optimized.
+    This is a blocking wrapper around `run_async`, for callers without an event loop.
+
+    Args:
+        widget (optional): The widget to update. This is only used when interface is set to GUI. Defaults to None.
+        mc_dir (str, optional): The directory to use. Defaults to the default directory based on your OS.
+        version (str, optional): The version to install. Defaults to the newest version
+        interface (str, optional): The interface to use, either CLI or GUI. Defaults to "GUI".
+        engine (str, optional): The packwiz engine to use, either "native" or "java". Defaults to "native".
+        save_dir (bool, optional): Whether to remember `mc_dir` in the config. Defaults to True.
+        icon (str, optional): The path to an image to use as the profile icon. Defaults to the icon shipped with the installer.
+        launcher_dir (str, optional): The directory of the launcher, where Fabric and the profile are installed. Defaults to the default directory based on your OS.
+        profile_batch (profiles.Batch, optional): A batch to add the profile to instead of writing it right away. Defaults to None.
+        bus (events.Bus, optional): The bus to report progress to. Defaults to one that logs, and shows progress on the CLI or in `widget`.
+
+    Raises:
+        events.Cancelled: If the install was cancelled with `bus.cancel()`.
+
+    Returns:
+        bool: Whether the pack was installed.
+    """
+    return asyncio.run(
+        run_async(
+            mc_dir,
+            version,
+            java_ver,
+            interface,
+            widget,
+            engine,
+            save_dir,
+            icon,
+            launcher_dir,
+            profile_batch,
+            bus,
+        )
+    )
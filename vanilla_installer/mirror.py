@@ -0,0 +1,153 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Populates a local mirror of everything an install downloads, for installing without internet access.
+
+A mirror is a folder where every URL is stored as `<host>/<path>`, e.g.
+`raw.githubusercontent.com/Fabulously-Optimized/.../pack.toml`. Point `--mirror` or the
+`mirror` config key at the folder itself, or at any HTTP server that serves it.
+Paths are stored decoded, see `path_for`. Only the native engine installs from a mirror,
+packwiz-installer would download the mods from the internet anyway.
+"""
+import os
+import posixpath
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote, urljoin, urlsplit
+
+from vanilla_installer import cache, log, main, network, packwiz, versions
+
+logger = log.setup_logging()
+
+WORKERS = 8  # mentioned in the help of the mirror sync command
+
+
+def path_for(url: str, mirror_dir: str) -> Path:
+    """
+    Gets where a URL is stored in a mirror folder.
+
+    Args:
+        url (str): The URL.
+        mirror_dir (str): The mirror folder.
+
+    Raises:
+        ValueError: If the URL would be stored outside of the mirror, or has a query string.
+
+    Returns:
+        Path: The path.
+    """
+    parts = urlsplit(url)
+    if parts.query:
+        # the mirror couldn't tell it apart from the same path with another query
+        raise ValueError(f"{url} has a query string, so it can't be mirrored.")
+    # stored under the decoded path, which is what a file:// URL or an HTTP server serving the
+    # folder looks for, e.g. "mod+1.20.jar" for "mod%2B1.20.jar"
+    path = unquote(parts.path)
+    relative = posixpath.normpath(f"{parts.hostname}/{path.lstrip('/')}")
+    if relative.startswith("../") or posixpath.isabs(relative):
+        raise ValueError(f"{url} can't be stored in a mirror.")
+    return Path(mirror_dir).resolve() / relative
+
+
+def pack_urls(pack_url: str) -> list:
+    """
+    Collects the URLs a native install of a pack downloads.
+
+    Args:
+        pack_url (str): The URL to the pack.toml.
+
+    Returns:
+        list: Tuples of the URL, its hash format and its hash. The hash is None if it's unknown.
+    """
+    pack = packwiz.load_pack(pack_url)
+    index_url, index = packwiz.load_index(pack_url, pack)
+    urls = [
+        (pack_url, None, None),
+        (index_url, pack["index"]["hash-format"], pack["index"]["hash"]),
+    ]
+    entries = index.get("files", [])
+    for entry in entries:
+        if entry.get("metafile", False):
+            urls.append(
+                (
+                    urljoin(index_url, entry["file"]),
+                    entry.get("hash-format", index["hash-format"]),
+                    entry["hash"],
+                )
+            )
+    files = packwiz.resolve_files(index_url, index, entries, max_workers=WORKERS)
+    urls.extend(
+        (file.url, file.hash_format, file.hash)
+        for file in files.values()
+        if file is not None
+    )
+    game_version = pack["versions"]["minecraft"]
+    fabric_version = pack["versions"]["fabric"]
+    urls.append((main.FABRIC_META_URL.format(game_version, fabric_version), None, None))
+    return urls
+
+
+def _copy(
+    url: str, hash_format: Optional[str], hash: Optional[str], mirror_dir: str
+) -> int:
+    source = cache.fetch_path(
+        url, expected=(hash_format, hash) if hash is not None else None
+    )
+    target = path_for(url, mirror_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_name(f".{target.name}.tmp")
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+    return source.stat().st_size
+
+
+def sync(
+    mirror_dir: str, mc_versions: Optional[list] = None, workers: int = WORKERS
+) -> int:
+    """
+    Downloads everything needed to install the given versions into a mirror folder.
+    Files are fetched through the download cache, so syncing again is cheap.
+    The mirror setting is ignored while syncing, everything comes from the internet.
+
+    Args:
+        mirror_dir (str): The mirror folder. It is created if needed.
+        mc_versions (list, optional): The Minecraft versions to mirror. Defaults to every supported version.
+        workers (int, optional): How many files to download at once. Defaults to WORKERS.
+
+    Raises:
+        ValueError: If a version isn't supported.
+        requests.exceptions.RequestException: If something couldn't be downloaded.
+        packwiz.PackwizError: If a pack is invalid.
+        hashing.HashMismatchError: If a file never matched its hash in the pack.
+
+    Returns:
+        int: The number of files in the mirror.
+    """
+    previous = network.get_mirror()
+    network.set_mirror(None)
+    try:
+        supported = versions.fetch()
+        urls = [
+            (versions.VERSIONS_URL, None, None),
+            (main.BOOTSTRAP_URL, None, None),
+        ]
+        for mc_version in mc_versions or supported:
+            if mc_version not in supported:
+                raise ValueError(f"Minecraft {mc_version} is not supported.")
+            logger.info(f"Collecting the files of Fabulously Optimized {mc_version}.")
+            urls.extend(pack_urls(supported[mc_version]))
+        # packs for different versions share a lot of mods
+        urls = list(dict.fromkeys(urls))
+
+        with ThreadPoolExecutor(workers, "mirror-sync") as executor:
+            size = sum(
+                executor.map(lambda url: _copy(*url, mirror_dir), urls),
+            )
+    finally:
+        network.set_mirror(previous)
+    logger.info(
+        f"Mirrored {len(urls)} files ({size / 1024 / 1024:.2f} MiB) to {mirror_dir}."
+    )
+    return len(urls)
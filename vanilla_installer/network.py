@@ -0,0 +1,451 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+The HTTP transport used by every network fetch in Vanilla Installer.
+
+All requests go through one pooled `requests.Session`, so connections to the same
+host are kept alive and reused across install stages instead of paying for a new
+TCP+TLS handshake each time.
+
+If a mirror is set (see `set_mirror`), every URL is fetched from `<mirror>/<host>/<path>`
+instead. The mirror can be a local folder or an HTTP server, see the mirror module.
+"""
+import email.utils
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+from urllib.parse import quote, unquote, urlsplit
+from urllib.request import url2pathname
+
+import requests
+import urllib3
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from vanilla_installer import __version__, log, trace
+
+logger = log.setup_logging()
+
+POOL_CONNECTIONS = 8  # how many hosts to keep a pool for
+POOL_MAXSIZE = 8  # how many connections to open per host, see get_pool_maxsize
+POOL_TIMEOUT = 120  # seconds a request waits for a free connection before giving up
+TIMEOUT = (10, 60)  # (connect, read) in seconds
+CHUNK_SIZE = 64 * 1024  # 64 KiB
+SEGMENT_THRESHOLD = (
+    32 * 1024 * 1024
+)  # files at least this large are downloaded in segments
+SEGMENTS = 4
+USER_AGENT = f"vanilla-installer/{__version__} (+https://github.com/Fabulously-Optimized/vanilla-installer)"
+
+_session = None
+_session_lock = threading.Lock()
+_mirror = None  # None means it wasn't set yet, "" means no mirror
+_pool_maxsize = None  # None means it wasn't read from the config yet
+
+
+class RangeError(requests.exceptions.RequestException):
+    """Raised when a server doesn't honour a range request, e.g. because the file changed."""
+
+
+class _FileAdapter(BaseAdapter):
+    """Serves file:// URLs, so a mirror can be a plain folder."""
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.headers = CaseInsensitiveDict()
+        path = Path(url2pathname(urlsplit(request.url).path))
+        try:
+            stat = path.stat()
+            if not path.is_file():
+                raise FileNotFoundError(path)
+        except OSError:
+            response.status_code, response.reason = 404, "Not Found"
+            response.raw = _EmptyBody()
+            return response
+        response.headers["Last-Modified"] = email.utils.formatdate(
+            stat.st_mtime, usegmt=True
+        )
+        since = request.headers.get("If-Modified-Since")
+        if since and email.utils.parsedate_to_datetime(since).timestamp() >= int(
+            stat.st_mtime
+        ):
+            response.status_code, response.reason = 304, "Not Modified"
+            response.raw = _EmptyBody()
+            return response
+        response.status_code, response.reason = 200, "OK"
+        response.headers["Content-Length"] = str(stat.st_size)
+        response.raw = _FileBody(path)
+        return response
+
+    def close(self):
+        pass
+
+
+class _HTTPConnectionPool(urllib3.HTTPConnectionPool):
+    def _get_conn(self, timeout=None):
+        # requests never passes a pool timeout, and with pool_block a request would then wait
+        # forever for a connection that's never given back
+        return super()._get_conn(POOL_TIMEOUT if timeout is None else timeout)
+
+
+class _HTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(POOL_TIMEOUT if timeout is None else timeout)
+
+
+class _HTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter whose requests give up after POOL_TIMEOUT when no connection is free."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _HTTPConnectionPool,
+            "https": _HTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        try:
+            return super().send(request, *args, **kwargs)
+        except urllib3.exceptions.EmptyPoolError as e:
+            # requests lets this one through as is, make it something callers catch
+            raise requests.exceptions.ConnectionError(
+                f"No connection to {urlsplit(request.url).hostname} became free within {POOL_TIMEOUT} seconds.",
+                request=request,
+            ) from e
+
+
+class _EmptyBody:
+    def read(self, *args) -> bytes:
+        return b""
+
+    def close(self) -> None:
+        pass
+
+
+class _FileBody:
+    # Response.close only closes a body that wasn't read to the end, and leaves the rest to
+    # release_conn, which a plain file doesn't have
+    def __init__(self, path: Path):
+        self.file = open(path, "rb")
+
+    def read(self, *args) -> bytes:
+        return self.file.read(*args)
+
+    def close(self) -> None:
+        self.file.close()
+
+    release_conn = close
+
+
+def _create_session(
+    pool_connections: int = POOL_CONNECTIONS, pool_maxsize: Optional[int] = None
+) -> requests.Session:
+    if pool_maxsize is None:
+        pool_maxsize = get_pool_maxsize()
+    session = requests.Session()
+    # pool_block makes pool_maxsize a hard per-host limit instead of a soft one
+    adapter = _HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.mount("file://", _FileAdapter())
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def configure(
+    pool_connections: int = POOL_CONNECTIONS, pool_maxsize: Optional[int] = None
+) -> None:
+    """
+    (Re-)configures the shared session. Existing connections are closed.
+
+    Args:
+        pool_connections (int, optional): How many hosts to keep a connection pool for. Defaults to POOL_CONNECTIONS.
+        pool_maxsize (int, optional): The maximum number of connections per host. Defaults to `get_pool_maxsize()`.
+    """
+    global _session, _pool_maxsize
+    if pool_maxsize is not None:
+        _pool_maxsize = pool_maxsize
+    pool_maxsize = get_pool_maxsize()
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _create_session(pool_connections, pool_maxsize)
+        logger.debug(
+            f"HTTP session configured with {pool_connections} pools of {pool_maxsize} connections."
+        )
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared session, creating it with the configured pool sizes if needed.
+
+    Returns:
+        requests.Session: The session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def get_pool_maxsize() -> int:
+    """
+    Gets the maximum number of connections per host, which is also how many files an install
+    downloads at once.
+
+    Returns:
+        int: The size passed to `configure`, or else the `connections_per_host` config key, or POOL_MAXSIZE if that isn't a positive number.
+    """
+    global _pool_maxsize
+    if _pool_maxsize is None:
+        # imported here for the same reason as in get_mirror
+        from vanilla_installer import config
+
+        value = config.get("connections_per_host")
+        try:
+            size = int(value)
+        except (TypeError, ValueError):
+            size = 0
+        if size < 1:
+            logger.warning(
+                f"Ignoring connections_per_host = {value!r}, using {POOL_MAXSIZE}."
+            )
+            size = POOL_MAXSIZE
+        _pool_maxsize = size
+    return _pool_maxsize
+
+
+def set_mirror(mirror: Optional[str]) -> None:
+    """
+    Sets the mirror to fetch everything from, overriding the `mirror` config key.
+
+    Args:
+        mirror (str, optional): A folder or an http(s) URL. An empty string or None disables the mirror.
+    """
+    global _mirror
+    _mirror = mirror or ""
+    if _mirror:
+        logger.info(f"Downloading everything from the mirror at {_mirror}.")
+
+
+def get_mirror() -> str:
+    """
+    Gets the mirror to fetch everything from.
+
+    Returns:
+        str: The mirror passed to `set_mirror`, or else the `mirror` config key. Empty if there is none.
+    """
+    if _mirror is None:
+        # imported here, the config module is slow to import and most callers set the mirror anyway
+        from vanilla_installer import config
+
+        set_mirror(str(config.get("mirror") or ""))
+    return _mirror
+
+
+def mirrored(url: str, mirror: Optional[str] = None) -> str:
+    """
+    Rewrites a URL to point into a mirror.
+
+    Args:
+        url (str): The URL.
+        mirror (str, optional): A folder or an http(s) URL. Defaults to `get_mirror()`.
+
+    Raises:
+        requests.exceptions.InvalidURL: If the URL has a query string. A mirror stores files by path alone, see `mirror.path_for`.
+
+    Returns:
+        str: `<mirror>/<host>/<path>`, or the URL itself if there is no mirror. The path is quoted the same way whether the URL was or not, see `mirror.path_for`.
+    """
+    mirror = get_mirror() if mirror is None else mirror
+    parts = urlsplit(url)
+    if not mirror or parts.scheme not in ("http", "https"):
+        return url
+    if parts.query:
+        # dropping it could serve a different file than the one asked for
+        raise requests.exceptions.InvalidURL(
+            f"{url} has a query string, so it can't be fetched from a mirror."
+        )
+    if urlsplit(mirror).scheme in ("http", "https", "file"):
+        base = mirror.rstrip("/")
+    else:
+        base = Path(mirror).resolve().as_uri()
+    return f"{base}/{parts.hostname}{quote(unquote(parts.path))}"
+
+
+def get(url: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+    """
+    Sends a GET request over the shared session, to the mirror if there is one.
+
+    Args:
+        url (str): The URL to get.
+        headers (dict, optional): Extra headers to send. Defaults to None.
+        **kwargs: Passed to `requests.Session.get`.
+
+    Returns:
+        requests.Response: The response.
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    # with stream=True this only times the response headers, the body is timed by stream_to
+    with trace.span("GET", "http", url=url) as span:
+        response = get_session().get(mirrored(url), headers=headers, **kwargs)
+        span.set("status", response.status_code)
+    return response
+
+
+def stream_to(
+    response: requests.Response,
+    file: BinaryIO,
+    hashers: tuple = (),
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Writes the body of a streamed response to a file in fixed-size chunks, hashing it on the way.
+
+    Args:
+        response (requests.Response): The response, requested with `stream=True`.
+        file (BinaryIO): The file to write to.
+        hashers (tuple, optional): hashlib objects to update with every chunk. Defaults to ().
+        chunk_size (int, optional): The size of each chunk in bytes. Defaults to CHUNK_SIZE.
+        progress (Callable[[int, int], None], optional): Called with the size of every chunk, see `events.Stage.advance`. Defaults to None.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    size = 0
+    with trace.span("download", "http", url=response.url) as span:
+        for chunk in response.iter_content(chunk_size):
+            file.write(chunk)
+            for hasher in hashers:
+                hasher.update(chunk)
+            size += len(chunk)
+            if progress is not None:
+                progress(len(chunk), 0)
+        span.set("bytes", size)
+    return size
+
+
+def validator(response: requests.Response) -> Optional[str]:
+    """
+    Gets the validator to send in If-Range when resuming a response.
+
+    Args:
+        response (requests.Response): The response.
+
+    Returns:
+        str | None: The strong ETag, or else the Last-Modified date, or None if there is neither.
+    """
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def is_resumable(response: requests.Response) -> bool:
+    """
+    Checks whether a response can be resumed later with a range request.
+
+    Args:
+        response (requests.Response): The response.
+
+    Returns:
+        bool: True if the server accepts byte ranges and sent a validator for the content.
+    """
+    return (
+        response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        # ranges apply to the encoded body, which requests decodes on the fly
+        and "Content-Encoding" not in response.headers
+        and validator(response) is not None
+    )
+
+
+def download_segments(
+    url: str,
+    path: Path,
+    size: int,
+    if_range: str,
+    segments: int = SEGMENTS,
+    done: Optional[set] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    """
+    Downloads `url` to `path` in parallel byte ranges, which are written straight to their offset.
+
+    Args:
+        url (str): The URL to download.
+        path (Path): The file to write to. It is created or resized to `size`.
+        size (int): The size of the file in bytes.
+        if_range (str): The validator of the content, see `validator`.
+        segments (int, optional): How many segments to split the file into. Defaults to SEGMENTS.
+        done (set, optional): Indices of segments that were already downloaded. Updated as segments complete.
+        progress (Callable[[int, int], None], optional): Told about the bytes left to download and every chunk, see `events.Stage.advance`. Defaults to None.
+
+    Raises:
+        RangeError: If the server sent something other than the requested range.
+        requests.exceptions.RequestException: If a segment failed to download.
+    """
+    done = done if done is not None else set()
+    segment_size = -(-size // segments)  # ceiling division
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab"):
+        pass
+    os.truncate(path, size)
+    if progress is not None:
+        left = sum(
+            min(segment_size, size - index * segment_size)
+            for index in range(segments)
+            if index not in done
+        )
+        progress(0, left)
+
+    def fetch_segment(index: int) -> None:
+        if index in done:
+            return
+        start = index * segment_size
+        end = min(start + segment_size, size) - 1
+        headers = {
+            "Range": f"bytes={start}-{end}",
+            "If-Range": if_range,
+            "Accept-Encoding": "identity",
+        }
+        with get(url, headers=headers, stream=True) as response:
+            if response.status_code != 206:
+                raise RangeError(
+                    f"Expected bytes {start}-{end} of {url}, got HTTP {response.status_code}.",
+                    response=response,
+                )
+            with open(path, "r+b") as file:
+                file.seek(start)
+                written = stream_to(response, file, progress=progress)
+        if written != end - start + 1:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Segment {index} of {url} is {written} bytes, expected {end - start + 1}."
+            )
+        done.add(index)
+
+    with ThreadPoolExecutor(segments, "download-segment") as executor:
+        # list() so the first failing segment raises here
+        list(executor.map(fetch_segment, range(segments)))
+
+
+def close() -> None:
+    """
+    Closes the shared session and all of its pooled connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,434 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+A native installer for packwiz modpacks.
+
+This reads pack.toml, index.toml and the .pw.toml metafiles directly and downloads
+the files concurrently, instead of starting packwiz-installer on a JVM.
+See https://packwiz.infra.link/reference/pack-format/ for the formats.
+"""
+import json
+import os
+import posixpath
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urljoin
+
+import requests
+import tomlkit as toml
+
+from vanilla_installer import cache, events, hashing, log, network
+
+logger = log.setup_logging()
+
+# written to the instance, records what was installed from which index
+MANIFEST_NAME = ".vanilla_installer.json"
+
+
+class PackwizError(Exception):
+    """Raised when a pack can't be installed."""
+
+
+class UnsupportedPackError(PackwizError):
+    """Raised when a pack uses a feature the native engine doesn't support."""
+
+
+class HashMismatchError(PackwizError, hashing.HashMismatchError):
+    """Raised when a downloaded file doesn't match the hash in the pack."""
+
+
+def hash_bytes(data: bytes, hash_format: str) -> str:
+    """
+    Hashes `data` in one of the formats packwiz supports.
+
+    Args:
+        data (bytes): The data to hash.
+        hash_format (str): sha1, sha256, sha512, md5 or murmur2.
+
+    Raises:
+        UnsupportedPackError: If the hash format is unknown.
+
+    Returns:
+        str: The hash, in the same notation packwiz uses (hex, or decimal for murmur2).
+    """
+    _check_format(hash_format)
+    return hashing.hash_bytes(data, hash_format)
+
+
+def hash_file(path: Path, hash_format: str) -> str:
+    """
+    Hashes a file in fixed-size chunks, so large files aren't read into memory at once.
+
+    Args:
+        path (Path): The file to hash.
+        hash_format (str): sha1, sha256, sha512, md5 or murmur2.
+
+    Raises:
+        UnsupportedPackError: If the hash format is unknown.
+
+    Returns:
+        str: The hash, in the same notation packwiz uses.
+    """
+    _check_format(hash_format)
+    return hashing.hash_file(path, (hash_format,))[hash_format.lower()]
+
+
+def _check_format(hash_format: str) -> None:
+    if hash_format.lower() not in hashing.FORMATS:
+        raise UnsupportedPackError(f"Unsupported hash format {hash_format}.")
+
+
+def verify(data, hash_format: str, expected: str, name: str) -> None:
+    """
+    Checks `data` against the expected hash.
+
+    Args:
+        data (bytes | Path): The data, or the path to a file with it.
+        hash_format (str): The format of `expected`.
+        expected (str): The expected hash.
+        name (str): The name to use in the error.
+
+    Raises:
+        HashMismatchError: If the hash doesn't match.
+    """
+    if isinstance(data, Path):
+        actual = hash_file(data, hash_format)
+    else:
+        actual = hash_bytes(data, hash_format)
+    if not hashing.matches(actual, expected):
+        raise HashMismatchError(
+            f"{name} has {hash_format} {actual}, expected {expected}."
+        )
+
+
+@dataclass
+class PackFile:
+    """A file that is part of a pack, and where it ends up in the instance."""
+
+    path: str  # relative to the instance directory
+    url: str
+    hash_format: str
+    hash: str
+    index_hash: str  # the hash of the index entry, i.e. of the metafile for mods
+    preserve: bool = False
+
+    def to_manifest(self) -> dict:
+        return {
+            "index_hash": self.index_hash,
+            "path": self.path,
+            "hash_format": self.hash_format,
+            "hash": self.hash,
+            "preserve": self.preserve,
+        }
+
+
+def _fetch_verified(
+    url: str,
+    hash_format: str,
+    expected: str,
+    name: str,
+    progress: Optional[Callable] = None,
+    revalidate: bool = False,
+) -> Path:
+    # The hash is checked while the file downloads, and a file that doesn't match is downloaded
+    # again on its own, see `cache.DownloadCache.fetch_path`. The URL of a hash-pinned file is
+    # (almost) never reused for different content, so by default a cached copy that still
+    # matches is trusted without a round trip.
+    _check_format(hash_format)
+    try:
+        return cache.get_cache().fetch_path(
+            url, revalidate, progress, expected=(hash_format, expected)
+        )
+    except hashing.HashMismatchError as e:
+        raise HashMismatchError(f"{name}: {e}") from e
+
+
+def load_pack(pack_url: str) -> dict:
+    """
+    Downloads and parses a pack.toml.
+
+    Args:
+        pack_url (str): The URL to the pack.toml.
+
+    Returns:
+        dict: The parsed pack.toml.
+    """
+    pack = toml.parse(cache.fetch(pack_url).decode("utf-8"))
+    pack_format = pack.get("pack-format", "packwiz:1.0.0")
+    if not pack_format.startswith("packwiz:1."):
+        raise UnsupportedPackError(f"Unsupported pack format {pack_format}.")
+    return pack
+
+
+def load_index(pack_url: str, pack: dict) -> tuple:
+    """
+    Downloads, verifies and parses the index of a pack.
+
+    Args:
+        pack_url (str): The URL to the pack.toml.
+        pack (dict): The parsed pack.toml.
+
+    Returns:
+        tuple: The URL to the index and the parsed index.
+    """
+    index_info = pack["index"]
+    index_url = urljoin(pack_url, index_info["file"])
+    # the index changes with every update of the pack, so check for a new one
+    data = _fetch_verified(
+        index_url,
+        index_info["hash-format"],
+        index_info["hash"],
+        "index.toml",
+        revalidate=True,
+    ).read_bytes()
+    return index_url, toml.parse(data.decode("utf-8"))
+
+
+def _resolve_entry(index_url: str, default_format: str, entry: dict, side: str):
+    hash_format = entry.get("hash-format", default_format)
+    file_url = urljoin(index_url, entry["file"])
+    target = entry.get("alias", entry["file"])
+    preserve = bool(entry.get("preserve", False))
+    if not entry.get("metafile", False):
+        return PackFile(
+            target, file_url, hash_format, entry["hash"], entry["hash"], preserve
+        )
+
+    metafile = toml.parse(
+        _fetch_verified(file_url, hash_format, entry["hash"], entry["file"]).read_text(
+            encoding="utf-8"
+        )
+    )
+    if metafile.get("side", "both") not in ("both", side):
+        logger.debug(f"Skipping {metafile['name']}, it is {metafile['side']}-only.")
+        return None
+    option = metafile.get("option", {})
+    if option.get("optional", False) and not option.get("default", False):
+        logger.debug(f"Skipping {metafile['name']}, it is optional.")
+        return None
+    download = metafile["download"]
+    if "url" not in download:
+        # e.g. mode = "metadata:curseforge", which needs the CurseForge API
+        raise UnsupportedPackError(
+            f"{metafile['name']} uses download mode {download.get('mode')}, which is not supported."
+        )
+    return PackFile(
+        posixpath.join(posixpath.dirname(target), metafile["filename"]),
+        download["url"],
+        download["hash-format"],
+        download["hash"],
+        entry["hash"],
+        preserve,
+    )
+
+
+def resolve_files(
+    index_url: str,
+    index: dict,
+    entries: list,
+    side: str = "client",
+    max_workers: int = 8,
+) -> dict:
+    """
+    Resolves entries of the index into the files that end up in the instance.
+    Metafiles are downloaded concurrently.
+
+    Args:
+        index_url (str): The URL to the index.
+        index (dict): The parsed index.
+        entries (list): The entries of the index to resolve.
+        side (str, optional): The side to install for. Defaults to "client".
+        max_workers (int, optional): How many metafiles to download at once. Defaults to 8.
+
+    Returns:
+        dict: The entry paths, mapped to their PackFile, or None if they are not installed.
+    """
+    default_format = index["hash-format"]
+    with ThreadPoolExecutor(max_workers, "packwiz-resolve") as executor:
+        resolved = executor.map(
+            lambda entry: _resolve_entry(index_url, default_format, entry, side),
+            entries,
+        )
+        return {entry["file"]: file for entry, file in zip(entries, resolved)}
+
+
+def read_manifest(mc_dir: Path) -> dict:
+    """
+    Reads the manifest of what was installed to the instance.
+
+    Args:
+        mc_dir (Path): The instance directory.
+
+    Returns:
+        dict: The manifest, or an empty one if there is none.
+    """
+    try:
+        manifest = json.loads((mc_dir / MANIFEST_NAME).read_bytes())
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+    manifest.setdefault("files", {})
+    return manifest
+
+
+def write_manifest(mc_dir: Path, manifest: dict) -> None:
+    """
+    Writes the manifest of what was installed to the instance.
+
+    Args:
+        mc_dir (Path): The instance directory.
+        manifest (dict): The manifest.
+    """
+    path = mc_dir / MANIFEST_NAME
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def _stat(mc_dir: Path, relative: str) -> dict:
+    # what the manifest remembers about an installed file, to notice when it changes
+    try:
+        stat = (mc_dir / relative).stat()
+    except FileNotFoundError:
+        return {}
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _is_installed(mc_dir: Path, installed: Optional[dict], entry: dict) -> bool:
+    if installed is None or installed["index_hash"] != entry["hash"]:
+        return False
+    # entries that were skipped (e.g. server-only mods) have no path
+    if installed["path"] is None:
+        return True
+    stat = _stat(mc_dir, installed["path"])
+    if not stat:
+        return False
+    if installed.get("preserve"):
+        # the user is meant to change these
+        return True
+    if stat == {key: installed.get(key) for key in stat}:
+        return True
+    # changed since it was installed, or installed before the manifest kept sizes
+    actual = hash_file(mc_dir / installed["path"], installed["hash_format"])
+    if hashing.matches(actual, installed["hash"]):
+        return True
+    logger.info(f"{installed['path']} was changed since it was installed.")
+    return False
+
+
+def _target_path(mc_dir: Path, relative: str) -> Path:
+    target = (mc_dir / relative).resolve()
+    if mc_dir != target and mc_dir not in target.parents:
+        raise PackwizError(f"{relative} would be installed outside of the instance.")
+    return target
+
+
+def install_file(
+    file: PackFile, mc_dir: Path, progress: Optional[Callable] = None
+) -> bool:
+    """
+    Downloads, verifies and writes a single file to the instance.
+
+    Args:
+        file (PackFile): The file.
+        mc_dir (Path): The resolved instance directory.
+        progress (Callable[[int, int], None], optional): Told about downloaded bytes, see `events.Stage.advance`. Defaults to None.
+
+    Returns:
+        bool: Whether the file was written. Preserved files that already exist are left alone.
+    """
+    target = _target_path(mc_dir, file.path)
+    if file.preserve and target.exists():
+        return False
+    source = _fetch_verified(file.url, file.hash_format, file.hash, file.path, progress)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_name(f".{target.name}.tmp")
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, target)
+    return True
+
+
+def install(
+    pack_url: str, mc_dir: str, side: str = "client", max_workers: Optional[int] = None
+) -> dict:
+    """
+    Installs or updates a packwiz pack in the given directory.
+    Only files that were added or changed since the last install are downloaded, and files
+    that were removed from the pack are deleted. See `MANIFEST_NAME`.
+    Downloads are reported to the current stage, see `events.current_progress`.
+
+    Args:
+        pack_url (str): The URL to the pack.toml.
+        mc_dir (str): The directory to install to.
+        side (str, optional): The side to install for. Defaults to "client".
+        max_workers (int, optional): How many files to download at once. Defaults to the HTTP pool size.
+
+    Raises:
+        PackwizError: If the pack couldn't be installed.
+
+    Returns:
+        dict: The parsed pack.toml.
+    """
+    max_workers = max_workers or network.get_pool_maxsize()
+    # the download threads don't know the stage we're in, so take the callback with us
+    progress = events.current_progress()
+    mc_path = Path(mc_dir).resolve()
+    manifest = read_manifest(mc_path)
+    installed = manifest["files"]
+    try:
+        pack = load_pack(pack_url)
+        logger.info(f"Installing {pack.get('name')} {pack.get('version')} natively.")
+        index_url, index = load_index(pack_url, pack)
+        entries = index.get("files", [])
+        changed = [
+            entry
+            for entry in entries
+            if not _is_installed(mc_path, installed.get(entry["file"]), entry)
+        ]
+        files = resolve_files(index_url, index, changed, side, max_workers)
+        to_install = [file for file in files.values() if file is not None]
+        with ThreadPoolExecutor(max_workers, "packwiz-install") as executor:
+            written = sum(
+                executor.map(
+                    lambda file: install_file(file, mc_path, progress), to_install
+                )
+            )
+    except (requests.exceptions.RequestException, KeyError) as e:
+        raise PackwizError(f"Could not install the pack: {e}") from e
+
+    new_files = {}
+    for entry in entries:
+        if entry["file"] in files:
+            file = files[entry["file"]]
+            new_files[entry["file"]] = (
+                {**file.to_manifest(), **_stat(mc_path, file.path)}
+                if file is not None
+                else {"index_hash": entry["hash"], "path": None}
+            )
+        else:
+            old = installed[entry["file"]]
+            # a file that only matched by its hash gets its new size and time recorded
+            new_files[entry["file"]] = (
+                {**old, **_stat(mc_path, old["path"])} if old["path"] else old
+            )
+    kept_paths = {file["path"] for file in new_files.values()}
+    removed = 0
+    for old in installed.values():
+        if old["path"] is None or old["path"] in kept_paths or old.get("preserve"):
+            continue
+        old_path = _target_path(mc_path, old["path"])
+        if old_path.exists():
+            logger.debug(f"Removing {old['path']}, it is no longer part of the pack.")
+            old_path.unlink()
+            removed += 1
+
+    manifest.update(
+        {"pack": pack_url, "index_hash": pack["index"]["hash"], "files": new_files}
+    )
+    write_manifest(mc_path, manifest)
+    logger.info(
+        f"Installed {written} changed files, kept {len(entries) - len(changed)} and removed {removed} in {mc_path}."
+    )
+    return pack
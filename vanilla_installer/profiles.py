@@ -0,0 +1,174 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Reads and writes the profiles of the vanilla launcher, in `launcher_profiles.json`.
+
+Updates are read-modify-write cycles under an advisory lock on a `.lock` file next to it, so
+several installers (threads or processes) can't lose each other's profiles. The file is
+replaced atomically, and everything we don't know about (settings, other profiles, fields
+the launcher adds to our profiles) is kept as it is. Use `Batch` to write many profiles at once.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import minecraft_launcher_lib as mll
+
+from vanilla_installer import log, trace
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = log.setup_logging()
+
+FILE_NAME = "launcher_profiles.json"
+
+# flock and msvcrt locks are per process (or per file handle), so threads also need this
+_lock = threading.Lock()
+
+
+def profiles_path(launcher_dir: Optional[str] = None) -> Path:
+    """
+    Gets the path to launcher_profiles.json.
+
+    Args:
+        launcher_dir (str, optional): The directory of the launcher. Defaults to the default directory based on your OS.
+
+    Returns:
+        Path: The path.
+    """
+    return Path(launcher_dir or mll.utils.get_minecraft_directory()) / FILE_NAME
+
+
+@contextmanager
+def _file_lock(path: Path):
+    # The lock file is never deleted, deleting it would let two processes lock different files.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "a+b") as lock_file:
+        if os.name == "nt":
+            lock_file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK retries for 10 seconds before giving up
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    logger.debug(f"Still waiting for the lock on {path}.")
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _read(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_bytes())
+    except FileNotFoundError:
+        logger.warning(f"{path} doesn't exist yet, creating it.")
+        return {"profiles": {}, "settings": {}, "version": 3}
+    except ValueError as e:
+        # don't replace a file we can't read, that would throw away all of the user's profiles
+        raise ValueError(f"{path} is not valid JSON: {e}") from e
+    data.setdefault("profiles", {})
+    return data
+
+
+def _write(path: Path, data: dict) -> None:
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        # the launcher indents with 2 spaces too
+        json.dump(data, file, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def read(launcher_dir: Optional[str] = None) -> dict:
+    """
+    Reads launcher_profiles.json.
+
+    Args:
+        launcher_dir (str, optional): The directory of the launcher. Defaults to the default directory based on your OS.
+
+    Raises:
+        ValueError: If the file is corrupt.
+
+    Returns:
+        dict: The whole file. The profiles are under "profiles".
+    """
+    return _read(profiles_path(launcher_dir))
+
+
+def upsert(profiles: dict, launcher_dir: Optional[str] = None) -> None:
+    """
+    Adds or updates profiles in a single read-modify-write.
+    Fields of existing profiles that aren't in the update (e.g. "created" or "lastUsed") are kept.
+
+    Args:
+        profiles (dict): The profiles to update, mapped to by their id.
+        launcher_dir (str, optional): The directory of the launcher. Defaults to the default directory based on your OS.
+
+    Raises:
+        ValueError: If the file is corrupt.
+    """
+    if not profiles:
+        return
+    path = profiles_path(launcher_dir)
+    with trace.span(
+        "write profiles", "profiles", count=len(profiles)
+    ), _lock, _file_lock(path):
+        data = _read(path)
+        existing = data["profiles"]
+        for profile_id, profile in profiles.items():
+            existing[profile_id] = {**existing.get(profile_id, {}), **profile}
+        _write(path, data)
+    logger.debug(f"Wrote {len(profiles)} profiles to {path}.")
+
+
+class Batch:
+    """
+    Collects profiles to write them to launcher_profiles.json all at once.
+    As a context manager, the profiles are written when the block ends.
+    """
+
+    def __init__(self, launcher_dir: Optional[str] = None):
+        self.launcher_dir = launcher_dir
+        self.profiles = {}
+        self._lock = threading.Lock()
+
+    def add(self, profile_id: str, profile: dict) -> None:
+        """
+        Adds a profile to write later.
+
+        Args:
+            profile_id (str): The id of the profile.
+            profile (dict): The profile.
+        """
+        with self._lock:
+            self.profiles[profile_id] = profile
+
+    def commit(self) -> None:
+        """
+        Writes the collected profiles, see `upsert`.
+        """
+        with self._lock:
+            profiles, self.profiles = self.profiles, {}
+        upsert(profiles, self.launcher_dir)
+
+    def __enter__(self) -> "Batch":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        # also write when something failed, the profiles of the instances that worked are fine
+        self.commit()
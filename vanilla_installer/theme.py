@@ -2,8 +2,13 @@
 # Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
 """
 Theme & design of the PySide6 GUI.
+
+The theme is read from the config once and kept in memory. The stylesheet of the whole GUI
+is compiled once per theme and font and cached, so switching either is a single
+`setStyleSheet` without touching the config file.
 """
 
+import functools
 import logging
 import pathlib
 from typing import Optional
@@ -16,30 +21,32 @@ logger = log.setup_logging()
 
 FILE = str(pathlib.Path("data/theme.txt").resolve())
 
+_current = None  # "dark" or "light", once it was read from the config
+
 
 def is_dark(to_dark: Optional[bool] = None) -> str:
     """
     Change or get the status of dark mode.
+    The config is only read the first time, after that the theme is kept in memory.
 
     Args:
         to_dark (bool, optional): Status. Defaults to None (just get status, without editing it).
 
     Returns:
-        str: The theme.
+        str: The theme, "dark" or "light".
     """
-    try:
-        config.read()["config"]["theme"]
-    except KeyError:
-        if darkdetect.isDark() is True:
-            return config.write("theme", "dark")
-        else:
-            return config.write("theme", "light")
-    if to_dark is False:
-        return config.write("theme", "light")
-    if to_dark is True:
-        return config.write("theme", "dark")
-    output = config.read()
-    return output["config"]["theme"]
+    global _current
+    if to_dark is not None:
+        _current = "dark" if to_dark else "light"
+        # written to disk a moment later, see config.write
+        config.write("theme", _current)
+    elif _current is None:
+        try:
+            _current = config.read()["config"]["theme"]
+        except KeyError:
+            _current = "dark" if darkdetect.isDark() is True else "light"
+            config.write("theme", _current)
+    return _current
 
 
 # colors from catppuccin latte and mocha https://github.com/catppuccin/catppuccin
@@ -93,6 +100,61 @@ def toggle() -> None:
     is_dark(is_dark() != "dark")
 
 
+@functools.cache
+def stylesheet(name: str, font: str) -> str:
+    """
+    Compiles the stylesheet of the whole application, see `gui.applyStyle`.
+    Widgets are selected by their object name.
+
+    Args:
+        name (str): The theme, "dark" or "light".
+        font (str): The font family.
+
+    Returns:
+        str: The stylesheet.
+    """
+    c = dark_theme if name == "dark" else light_theme
+
+    def footer_button(widget: str, side: str) -> str:
+        # the links in the corners only show their text when hovered
+        return (
+            f'QPushButton#{widget} {{ color: #00000000; font-family: "{font}" }}\n'
+            f'QPushButton#{widget}:hover {{ color: {c["label"]}; text-align: {side}; padding-{side}: 30px }}'
+        )
+
+    rules = [
+        # main window
+        f'#centralwidget {{ background-color: {c["base"]} }}',
+        f'QLabel#title {{ color: {c["text"]}; font: 24pt "{font}" }}',
+        f'QLabel#subtitle {{ color: {c["subtitle"]}; font: 15pt "{font}" }}',
+        f'QPushButton#installButton {{ border: none; background: {c["blue"]}; color: {c["base"]}; border-radius: 5px; font: 15pt "{font}" }}',
+        f'QPushButton#installButton:hover {{ background: {c["lavender"]} }}',
+        f'QPushButton#installButton:pressed {{ background: {c["installbuttonpressed"]} }}',
+        # while the selected location is being installed to, see gui.Ui_MainWindow.updateInstallButton
+        f'QPushButton#installButton[busy="true"], QPushButton#installButton[busy="true"]:hover {{ background: {c["installbuttonpressed"]} }}',
+        f'QPushButton#locationSelector {{ border: none; background: {c["button"]}; border-radius: 5px; font-family: "{font}" }}',
+        f'QPushButton#locationSelector:hover {{ background: {c["buttonhovered"]} }}',
+        f'QPushButton#locationSelector:pressed {{ background: {c["buttonpressed"]} }}',
+        footer_button("infoButton", "left"),
+        footer_button("issuesButton", "left"),
+        footer_button("themeToggle", "right"),
+        footer_button("settingsButton", "right"),
+        footer_button("versionHelp", "right"),
+        f'QLabel#versionLabel, QLabel#locationLabel {{ color: {c["label"]}; font: 12pt "{font}" }}',
+        f'QComboBox#versionSelector, QComboBox#versionSelector QAbstractItemView {{ font: 12pt "{font}" }}',
+        f'QTextEdit#selectedLocation {{ color: {c["text"]}; background-color: {c["crust"]}; font: 12pt "{font}" }}',
+        # settings dialog
+        f'QDialog#Dialog {{ background-color: {c["base"]} }}',
+        f'#buttonBox QPushButton {{ border: none; background-color: {c["button"]}; color: {c["text"]}; padding: 8px; border-radius: 5px; font-family: "{font}" }}',
+        f'#buttonBox QPushButton:hover {{ background-color: {c["buttonhovered"]} }}',
+        f'#buttonBox QPushButton:pressed {{ background-color: {c["buttonpressed"]} }}',
+        f'QCheckBox#fontDyslexicCheckbox {{ color: {c["label"]}; font-family: "{font}" }}',
+        f'QLabel#errorLabel {{ color: {c["red"]}; font: 8pt "{font}" }}',
+    ]
+    logger.debug(f"Compiled the stylesheet for the {name} theme with {font}.")
+    return "\n".join(rules)
+
+
 if __name__ == "__main__":
     logger.debug("theme module being initialized.")
     logger.debug("Dark Mode?", is_dark())
@@ -0,0 +1,179 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Records where the time of an install goes, as spans in the Chrome trace event format.
+
+Stages, HTTP requests, subprocesses and other slow steps are wrapped in `span`. Nothing is
+recorded until `start` is called (`vanilla-installer install --trace out.json`); until then
+`span` returns a shared do-nothing object, so the spans cost next to nothing. Open the file
+in chrome://tracing or https://ui.perfetto.dev.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+_events = None  # the recorded events, None when not recording
+_start = 0  # time.perf_counter_ns() when recording started
+_thread_names = {}  # thread id -> name, for the metadata events
+_ids = itertools.count(1)  # ids of overlapping spans
+
+
+def _now() -> int:
+    # microseconds since recording started, the unit of trace events
+    return (time.perf_counter_ns() - _start) // 1000
+
+
+class _NoSpan:
+    # what span returns when nothing is recorded
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def set(self, key: str, value) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """
+    A span that's being recorded. Use `span` to create one.
+    """
+
+    def __init__(self, name: str, category: str, overlapping: bool, args: dict):
+        self.name = name
+        self.category = category
+        self.overlapping = overlapping
+        self.args = args
+
+    def set(self, key: str, value) -> None:
+        """
+        Adds an argument to the span, e.g. a result that's only known at the end.
+
+        Args:
+            key (str): The name of the argument.
+            value: The value. Must be JSON serializable.
+        """
+        self.args[key] = value
+
+    def __enter__(self) -> "Span":
+        thread = threading.current_thread()
+        self.tid = thread.ident
+        _thread_names.setdefault(self.tid, thread.name)
+        self.begin = _now()
+        if self.overlapping:
+            self.id = next(_ids)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        end = _now()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        events = _events
+        if events is None:
+            # recording stopped in the meantime
+            return
+        common = {
+            "name": self.name,
+            "cat": self.category,
+            "pid": os.getpid(),
+            "tid": self.tid,
+        }
+        # list.append is atomic, so threads don't need a lock to record
+        if self.overlapping:
+            # spans that aren't nested in the other spans of their thread, e.g. the stages
+            # of an install running side by side in the event loop, get a track of their own
+            events.append(
+                {
+                    **common,
+                    "ph": "b",
+                    "id": self.id,
+                    "ts": self.begin,
+                    "args": self.args,
+                }
+            )
+            events.append({**common, "ph": "e", "id": self.id, "ts": end})
+        else:
+            events.append(
+                {
+                    **common,
+                    "ph": "X",
+                    "ts": self.begin,
+                    "dur": end - self.begin,
+                    "args": self.args,
+                }
+            )
+
+
+def span(name: str, category: str = "", overlapping: bool = False, **args):
+    """
+    Creates a span to time a block with: `with trace.span("fetch", "http", url=url):`.
+
+    Args:
+        name (str): What happens in the block.
+        category (str, optional): e.g. "http", "stage" or "subprocess". Defaults to "".
+        overlapping (bool, optional): Whether the span may overlap other spans in its thread without being nested in them. Defaults to False.
+        **args: Details to show with the span. Must be JSON serializable.
+
+    Returns:
+        Span: The span, or a shared object that does nothing if nothing is recorded.
+    """
+    if _events is None:
+        return _NO_SPAN
+    return Span(name, category, overlapping, args)
+
+
+def enabled() -> bool:
+    """
+    Checks whether spans are recorded, for callers that need to do work to describe a span.
+
+    Returns:
+        bool: Whether `start` was called.
+    """
+    return _events is not None
+
+
+def start() -> None:
+    """
+    Starts recording spans. Spans that were recorded before are discarded.
+    """
+    global _events, _start
+    _thread_names.clear()
+    _start = time.perf_counter_ns()
+    _events = []
+
+
+def stop(path: Optional[str] = None) -> list:
+    """
+    Stops recording spans.
+
+    Args:
+        path (str, optional): A file to write the spans to, in the Chrome trace event format. Defaults to not writing them.
+
+    Returns:
+        list: The recorded trace events.
+    """
+    global _events
+    events, _events = _events or [], None
+    pid = os.getpid()
+    metadata = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": tid,
+            "args": {"name": name},
+        }
+        for tid, name in _thread_names.items()
+    ]
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, file)
+    return events
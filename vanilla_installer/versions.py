@@ -0,0 +1,162 @@
+# Copyright (C) Fabulously Optimized 2023
+# Licensed under the MIT License. The full license text can be found at https://github.com/Fabulously-Optimized/vanilla-installer/blob/main/LICENSE.md.
+"""
+Resolves the list of Minecraft versions FO supports.
+
+The list is fetched at most once per process and a copy is kept on disk. A fresh copy is
+used as-is; a stale one is served immediately while a newer one is fetched in the background.
+The GUI shows `cached` right away and calls `refresh` from a worker thread instead.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from vanilla_installer import cache, log
+
+logger = log.setup_logging()
+
+VERSIONS_URL = "https://raw.githubusercontent.com/Fabulously-Optimized/vanilla-installer/main/vanilla_installer/assets/versions.json"
+BUNDLED_PATH = Path(__file__).parent / "assets" / "versions.json"
+TTL = 60 * 60  # 1 hour
+
+_versions = None
+_lock = threading.Lock()
+_refresh_thread = None
+
+
+def _disk_path() -> Path:
+    return cache.get_cache().path / "versions.json"
+
+
+def _read_disk() -> Optional[dict]:
+    try:
+        return json.loads(_disk_path().read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_disk(versions: dict) -> None:
+    path = _disk_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(
+        json.dumps({"fetched_at": time.time(), "versions": versions}), encoding="utf-8"
+    )
+    os.replace(temp_path, path)
+
+
+def fetch() -> dict:
+    """
+    Fetches the version list from GitHub, bypassing the in-process and on-disk copies.
+
+    Raises:
+        requests.exceptions.RequestException: If the list couldn't be downloaded.
+
+    Returns:
+        dict: The versions, mapped to their pack.toml URL.
+    """
+    global _versions
+    # downloaded without holding the lock, `cached` and `resolve` mustn't wait for the network
+    versions = dict(json.loads(cache.fetch(VERSIONS_URL)))
+    _write_disk(versions)
+    with _lock:
+        _versions = versions
+    return versions
+
+
+def _refresh_in_background() -> None:
+    global _refresh_thread
+
+    def refresh():
+        try:
+            fetch()
+            logger.debug("Refreshed the version list in the background.")
+        except (requests.exceptions.RequestException, ValueError):
+            logger.warning("Could not refresh the version list, keeping the stale one.")
+
+    if _refresh_thread is None or not _refresh_thread.is_alive():
+        _refresh_thread = threading.Thread(
+            target=refresh, name="versions-refresh", daemon=True
+        )
+        _refresh_thread.start()
+
+
+def resolve(ttl: float = TTL) -> dict:
+    """
+    Returns the supported versions, fetching them only if no usable copy exists.
+
+    Args:
+        ttl (float, optional): How old the on-disk copy may be before it's revalidated, in seconds. Defaults to TTL.
+
+    Returns:
+        dict: The versions, mapped to their pack.toml URL. The newest version comes first.
+    """
+    global _versions
+    with _lock:
+        if _versions is not None:
+            return _versions
+        stored = _read_disk()
+        if stored is not None:
+            _versions = stored["versions"]
+            if time.time() - stored.get("fetched_at", 0) > ttl:
+                logger.debug("Version list is stale, serving it while revalidating.")
+                _refresh_in_background()
+            return _versions
+    try:
+        return fetch()
+    except (requests.exceptions.RequestException, ValueError):
+        # This should never happen unless a) there's no internet connection, b) the file was deleted or is missing in a development case.
+        # In either case, fall back to the copy bundled with the installer.
+        logger.warning("GitHub failed, falling back to the bundled version list...")
+        bundled = dict(json.loads(BUNDLED_PATH.read_bytes()))
+        with _lock:
+            # another thread may have fetched it in the meantime
+            if _versions is None:
+                _versions = bundled
+            return _versions
+
+
+def cached() -> dict:
+    """
+    Returns the best version list available without downloading anything: the one this process
+    already resolved, else the copy on disk (however old it is), else the one bundled with the installer.
+
+    Returns:
+        dict: The versions, mapped to their pack.toml URL. The newest version comes first.
+    """
+    with _lock:
+        if _versions is not None:
+            return _versions
+    stored = _read_disk()
+    if stored is not None:
+        return stored["versions"]
+    return dict(json.loads(BUNDLED_PATH.read_bytes()))
+
+
+def refresh(ttl: float = TTL) -> dict:
+    """
+    Makes sure the version list is at most `ttl` old, downloading it if it isn't.
+    Unlike `resolve`, this waits for the download, so call it from a background thread.
+
+    Args:
+        ttl (float, optional): How old the on-disk copy may be before it's downloaded again, in seconds. Defaults to TTL.
+
+    Returns:
+        dict: The versions, mapped to their pack.toml URL. If the download failed, the list from `cached`.
+    """
+    global _versions
+    stored = _read_disk()
+    if stored is not None and time.time() - stored.get("fetched_at", 0) <= ttl:
+        with _lock:
+            _versions = stored["versions"]
+            return _versions
+    try:
+        return fetch()
+    except (requests.exceptions.RequestException, ValueError):
+        logger.warning("Could not refresh the version list, keeping the one we have.")
+        return cached()